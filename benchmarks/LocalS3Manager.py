@@ -0,0 +1,146 @@
+import io
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+
+from utils.S3Manager import S3Manager
+
+
+class _NoSuchKey(ClientError):
+    pass
+
+
+class _LocalObjectSummary:
+    def __init__(self, key, last_modified):
+        self.key = key
+        self.last_modified = last_modified
+
+
+class _LocalObject:
+    def __init__(self, store, bucket_name, key):
+        self.store = store
+        self.bucket_name = bucket_name
+        self.key = key
+
+    def _stored(self, operation):
+        stored = self.store.objects.get((self.bucket_name, self.key))
+        if stored is None:
+            raise _NoSuchKey(
+                {"Error": {"Code": "404", "Message": "Not Found"}}, operation
+            )
+        return stored
+
+    def get(self):
+        with self.store.lock:
+            self.store.calls["GetObject"] += 1
+            stored = self._stored("GetObject")
+            self.store.bytes_read += len(stored["body"])
+        response = {
+            "Body": io.BytesIO(stored["body"]),
+            "ContentType": stored["content_type"],
+            "LastModified": stored["last_modified"],
+        }
+        if stored["content_encoding"]:
+            response["ContentEncoding"] = stored["content_encoding"]
+        return response
+
+    def put(self, Body, ContentType=None, ContentEncoding=None):
+        body = Body.encode("utf-8") if isinstance(Body, str) else bytes(Body)
+        with self.store.lock:
+            self.store.calls["PutObject"] += 1
+            self.store.bytes_written += len(body)
+            self.store.objects[(self.bucket_name, self.key)] = {
+                "body": body,
+                "content_type": ContentType,
+                "content_encoding": ContentEncoding,
+                "last_modified": datetime.now(timezone.utc),
+            }
+
+    def load(self):
+        with self.store.lock:
+            self.store.calls["HeadObject"] += 1
+            self._stored("HeadObject")
+
+
+class _LocalObjectCollection:
+    def __init__(self, store, bucket_name):
+        self.store = store
+        self.bucket_name = bucket_name
+
+    def filter(self, Prefix=""):
+        with self.store.lock:
+            self.store.calls["ListObjects"] += 1
+            return [
+                _LocalObjectSummary(key, stored["last_modified"])
+                for (bucket_name, key), stored in sorted(self.store.objects.items())
+                if bucket_name == self.bucket_name and key.startswith(Prefix)
+            ]
+
+
+class _LocalBucket:
+    def __init__(self, store, bucket_name):
+        self.objects = _LocalObjectCollection(store, bucket_name)
+
+
+class _LocalClientExceptions:
+    NoSuchKey = _NoSuchKey
+    ClientError = ClientError
+
+
+class _LocalClient:
+    exceptions = _LocalClientExceptions()
+
+
+class _LocalMeta:
+    client = _LocalClient()
+
+
+class LocalS3Resource:
+    """In-memory stand-in for the parts of the boto3 S3 resource S3Manager uses.
+
+    Counts every call by S3 operation name, so a replay can report how many
+    requests a run would have made against the real bucket.
+    """
+
+    meta = _LocalMeta()
+
+    def __init__(self):
+        self.objects = {}
+        self.calls = Counter()
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.lock = threading.Lock()
+
+    def Object(self, bucket_name, key):
+        return _LocalObject(self, bucket_name, key)
+
+    def Bucket(self, bucket_name):
+        return _LocalBucket(self, bucket_name)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "calls": dict(self.calls),
+                "objects": len(self.objects),
+                "bytes_read": self.bytes_read,
+                "bytes_written": self.bytes_written,
+            }
+
+    def reset_stats(self):
+        with self.lock:
+            self.calls.clear()
+            self.bytes_read = 0
+            self.bytes_written = 0
+
+
+class LocalS3Manager(S3Manager):
+    """S3Manager backed by a LocalS3Resource instead of AWS.
+
+    Every S3Manager method runs unchanged on top of the local store, so replays
+    exercise the same manifest, snapshot and listing logic as a deployed run.
+    """
+
+    def __init__(self, s3_resource=None):
+        self.s3_resource = s3_resource or LocalS3Resource()
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PATH = "/webhook"
+
+
+class HostBehaviour:
+    """How the replay server answers for one host: delayed, failing or both.
+
+    ``fail_status`` is an HTTP status code to return instead of the recording,
+    or "reset" to close the connection without any response.
+    """
+
+    def __init__(self, delay_seconds=0.0, fail_status=None):
+        self.delay_seconds = delay_seconds
+        self.fail_status = fail_status
+
+
+class ReplayServer:
+    """Local HTTP server replaying recorded pages and capturing webhook posts.
+
+    Requests arrive as ``/<scheme>/<host><path>`` (see ReplayAdapter) and are
+    answered from ``recordings``, keyed by the original URL, or from the
+    longest matching entry of ``prefix_recordings``. Pages carry an ETag and
+    honour If-None-Match, so conditional GETs behave as against a real site.
+    POSTs to /webhook are stored in ``webhook_messages``.
+    """
+
+    def __init__(self, recordings, prefix_recordings=None, host_behaviours=None):
+        self.recordings = recordings
+        self.prefix_recordings = sorted(
+            (prefix_recordings or {}).items(), key=lambda item: -len(item[0])
+        )
+        self.host_behaviours = host_behaviours or {}
+        self.requests_by_host = Counter()
+        self.responses_by_status = Counter()
+        self.webhook_messages = []
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def webhook_url(self):
+        return f"{self.base_url}{WEBHOOK_PATH}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests_by_host.clear()
+            self.responses_by_status.clear()
+            self.webhook_messages.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": sum(self.requests_by_host.values()),
+                "requests_by_host": dict(self.requests_by_host),
+                "responses_by_status": dict(self.responses_by_status),
+                "webhook_messages": len(self.webhook_messages),
+                "webhook_cards": sum(
+                    len(message.get("cardsV2", [])) for message in self.webhook_messages
+                ),
+            }
+
+    def _recording_for(self, url):
+        if url in self.recordings:
+            return self.recordings[url]
+        for prefix, body in self.prefix_recordings:
+            if url.startswith(prefix):
+                return body
+        return None
+
+    def _make_handler(self):
+        server = self
+
+        class ReplayRequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _send(self, status, body=b"", headers=None):
+                with server.lock:
+                    server.responses_by_status[status] += 1
+                self.send_response(status)
+                for header_name, header_value in (headers or {}).items():
+                    self.send_header(header_name, header_value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                scheme, _, rest = self.path.lstrip("/").partition("/")
+                host = rest.split("/", 1)[0].split("?", 1)[0]
+                url = f"{scheme}://{rest}"
+                with server.lock:
+                    server.requests_by_host[host] += 1
+
+                behaviour = server.host_behaviours.get(host)
+                if behaviour is not None:
+                    if behaviour.delay_seconds:
+                        time.sleep(behaviour.delay_seconds)
+                    if behaviour.fail_status == "reset":
+                        self.close_connection = True
+                        self.connection.close()
+                        return
+                    if behaviour.fail_status is not None:
+                        self._send(int(behaviour.fail_status))
+                        return
+
+                recording = server._recording_for(url)
+                if recording is None:
+                    self._send(404)
+                    return
+
+                body = recording.encode("utf-8")
+                etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, headers={"ETag": etag})
+                    return
+                self._send(
+                    200,
+                    body,
+                    {"Content-Type": "text/html; charset=utf-8", "ETag": etag},
+                )
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if not self.path.startswith(WEBHOOK_PATH):
+                    self._send(404)
+                    return
+                with server.lock:
+                    server.requests_by_host["webhook"] += 1
+                    server.webhook_messages.append(json.loads(body or b"{}"))
+                self._send(200, b"{}", {"Content-Type": "application/json"})
+
+        return ReplayRequestHandler
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Transport adapter sending every request to a ReplayServer.
+
+    ``https://host/path`` becomes ``<server>/https/host/path``; requests already
+    addressed to the server, such as webhook posts, pass through unchanged.
+    Proxies are ignored so that nothing leaves the machine.
+    """
+
+    def __init__(self, server_base_url, **adapter_kwargs):
+        super().__init__(**adapter_kwargs)
+        self.server_base_url = server_base_url
+
+    def send(self, request, **kwargs):
+        if not request.url.startswith(self.server_base_url):
+            original_url = urlsplit(request.url)
+            request.url = (
+                f"{self.server_base_url}/{original_url.scheme}/"
+                f"{original_url.netloc}{original_url.path or '/'}"
+                + (f"?{original_url.query}" if original_url.query else "")
+            )
+        kwargs["proxies"] = {}
+        return super().send(request, **kwargs)
@@ -0,0 +1,119 @@
+"""Import-time profile of the Lambda entry point, as paid on a cold start.
+
+Usage: python -m benchmarks.import_profile [--module NAME ...] [--top N]
+                                           [--sort cumulative|self] [--runs N]
+
+Each module is imported in a fresh interpreter with ``-X importtime``; the
+report lists the slowest imports by cumulative or self time and the total.
+With --runs N the whole import is timed over N fresh interpreters as well.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_TIME_PREFIX = "import time:"
+
+
+def parse_import_times(stderr):
+    """Returns [(self µs, cumulative µs, module name)] from -X importtime output."""
+    import_times = []
+    for line in stderr.splitlines():
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            continue
+        fields = line[len(IMPORT_TIME_PREFIX) :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # The first line is the column header
+            continue
+        import_times.append(
+            (int(fields[0]), int(fields[1]), fields[2].rstrip().lstrip(" "))
+        )
+    return import_times
+
+
+def profile_import(module_name):
+    """Imports ``module_name`` in a fresh interpreter and returns its import times."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(
+            f"Importing {module_name} failed:\n{completed.stderr[-2000:]}"
+        )
+    return parse_import_times(completed.stderr)
+
+
+def time_cold_imports(module_name, runs):
+    """Returns the wall-clock seconds of importing ``module_name`` in each of
+    ``runs`` fresh interpreters, interpreter start-up excluded."""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module_name}; print(time.perf_counter() - started)"
+    )
+    durations = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=PROJECT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        durations.append(float(completed.stdout.strip().splitlines()[-1]))
+    return durations
+
+
+def print_profile(module_name, import_times, top, sort_key):
+    column = 1 if sort_key == "cumulative" else 0
+    # The top-level import's cumulative time is the module's total
+    total_us = max((entry[1] for entry in import_times), default=0)
+    print(f"{module_name}: {len(import_times)} modules, {total_us / 1000:.1f} ms")
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for self_us, cumulative_us, name in sorted(
+        import_times, key=lambda entry: entry[column], reverse=True
+    )[:top]:
+        print(f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}  {name}")
+
+
+def main(arguments):
+    parser = argparse.ArgumentParser(
+        description="Report which imports dominate a cold start."
+    )
+    parser.add_argument(
+        "--module",
+        action="append",
+        help="Module to profile (repeatable, default lambda_function).",
+    )
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--sort", choices=("cumulative", "self"), default="cumulative")
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=0,
+        help="Also time the import over N fresh interpreters.",
+    )
+    options = parser.parse_args(arguments)
+
+    for module_name in options.module or ["lambda_function"]:
+        print_profile(
+            module_name, profile_import(module_name), options.top, options.sort
+        )
+        if options.runs:
+            durations = sorted(time_cold_imports(module_name, options.runs))
+            print(
+                f"cold import over {options.runs} runs: "
+                f"min {durations[0] * 1000:.1f} ms, "
+                f"median {durations[len(durations) // 2] * 1000:.1f} ms"
+            )
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
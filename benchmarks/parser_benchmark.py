@@ -0,0 +1,202 @@
+"""Offline benchmark of every fetcher's parse path against recorded HTML fixtures.
+
+Usage: python -m benchmarks.parser_benchmark [--source NAME ...] [--scale N ...]
+                                             [--repeats N] [--backend NAME]
+
+Each fixture marks a repeatable region between ``<!-- benchmark:repeat -->`` and
+``<!-- /benchmark:repeat -->``; scaling a fixture by N repeats that region N
+times, so parsers can be compared on pages 10x or 100x the recorded size.
+A marker can sit inside an attribute value, as in the Japan House v-bind JSON,
+so fixtures are always read through ``load_fixture`` rather than opened directly.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from fetchers.DaiwaFoundationEventFetcher import DaiwaFoundationEventFetcher
+from fetchers.EmbassyEventFetcher import EmbassyEventFetcher
+from fetchers.HtmlParser import available_backends, use_backend
+from fetchers.JapanFoundationEventFetcher import JapanFoundationEventFetcher
+from fetchers.JapanHouseEventFetcher import JapanHouseEventFetcher
+from fetchers.JapanSocietyEventFetcher import JapanSocietyEventFetcher
+from fetchers.JETAAEventFetcher import JETAAEventFetcher
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+REPEAT_START = "<!-- benchmark:repeat -->"
+REPEAT_END = "<!-- /benchmark:repeat -->"
+
+# (source, fixture path, factory returning the parse step to time)
+BENCHMARKS = [
+    (
+        "jetaa",
+        "jetaa/calendar_month.html",
+        lambda: JETAAEventFetcher(2025).parse_events,
+    ),
+    (
+        "japan_house",
+        "japan_house/whats_on.html",
+        lambda: JapanHouseEventFetcher()._parse_page,
+    ),
+    (
+        "japan_society",
+        "japan_society/listing.html",
+        lambda: JapanSocietyEventFetcher()._parse_listing,
+    ),
+    (
+        "japan_society",
+        "japan_society/detail.html",
+        lambda: JapanSocietyEventFetcher()._parse_event_images,
+    ),
+    (
+        "japan_foundation",
+        "japan_foundation/whatson.html",
+        lambda: JapanFoundationEventFetcher()._parse_events,
+    ),
+    (
+        "daiwa_foundation",
+        "daiwa_foundation/listing.html",
+        lambda: DaiwaFoundationEventFetcher()._extract_event_links,
+    ),
+    (
+        "daiwa_foundation",
+        "daiwa_foundation/detail.html",
+        lambda: lambda html: DaiwaFoundationEventFetcher()._extract_event_details(
+            html, "https://dajf.org.uk/events/modern-japanese-politics"
+        ),
+    ),
+    (
+        "embassy",
+        "embassy/month_list.html",
+        lambda: EmbassyEventFetcher(2025)._parse_month_events,
+    ),
+]
+
+
+def load_fixture(fixture_path, scale=1):
+    """Returns the fixture's markup with its repeatable region repeated ``scale`` times.
+
+    The markers are always removed, even at scale 1, since the raw file is not
+    valid markup where they sit inside an attribute.
+    """
+    # newline="" keeps the CRLF line endings some parsers split on
+    with open(
+        os.path.join(FIXTURES_DIR, fixture_path), "r", encoding="utf-8", newline=""
+    ) as fixture_file:
+        markup = fixture_file.read()
+
+    start = markup.find(REPEAT_START)
+    end = markup.find(REPEAT_END)
+    if start == -1 or end == -1:
+        return markup
+    region = markup[start + len(REPEAT_START) : end]
+    return markup[:start] + region * scale + markup[end + len(REPEAT_END) :]
+
+
+def count_events(parsed):
+    """Counts the events (or links, or images) a parse step returned."""
+    if isinstance(parsed, dict):
+        return len(parsed["events"]) if "events" in parsed else len(parsed)
+    if isinstance(parsed, list):
+        return len(parsed)
+    return 1 if parsed else 0
+
+
+def run_benchmark(parse, markup, repeats=3):
+    """Times ``parse(markup)`` and measures its peak traced memory.
+
+    The best of ``repeats`` untraced runs is reported, and memory is measured
+    in a separate run because tracing slows parsing down.
+    """
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        parsed = parse(markup)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        parse(markup)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best_seconds = min(timings)
+    events = count_events(parsed)
+    return {
+        "page_bytes": len(markup.encode("utf-8")),
+        "events": events,
+        "seconds": best_seconds,
+        "events_per_second": events / best_seconds if best_seconds else 0.0,
+        "peak_memory_bytes": peak_bytes,
+    }
+
+
+def run_suite(sources=None, scales=(1, 10), repeats=3):
+    """Runs every selected benchmark at each scale and returns one row per run."""
+    rows = []
+    for source, fixture_path, make_parse in BENCHMARKS:
+        if sources and source not in sources:
+            continue
+        parse = make_parse()
+        for scale in scales:
+            markup = load_fixture(fixture_path, scale)
+            result = run_benchmark(parse, markup, repeats)
+            rows.append(
+                {"source": source, "fixture": fixture_path, "scale": scale, **result}
+            )
+    return rows
+
+
+def print_rows(rows):
+    print(
+        f"{'fixture':<34} {'scale':>5} {'KiB':>8} {'events':>7} "
+        f"{'ms':>9} {'events/s':>10} {'peak KiB':>9}"
+    )
+    for row in rows:
+        print(
+            f"{row['fixture']:<34} {row['scale']:>5} "
+            f"{row['page_bytes'] / 1024:>8.1f} {row['events']:>7} "
+            f"{row['seconds'] * 1000:>9.2f} {row['events_per_second']:>10.0f} "
+            f"{row['peak_memory_bytes'] / 1024:>9.0f}"
+        )
+
+
+def main(arguments):
+    parser = argparse.ArgumentParser(
+        description="Benchmark fetcher parse paths on recorded HTML fixtures."
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        choices=sorted({source for source, _, _ in BENCHMARKS}),
+        help="Only benchmark this source (repeatable).",
+    )
+    parser.add_argument(
+        "--scale",
+        action="append",
+        type=int,
+        help="Repeat each fixture's marked region N times (repeatable, default 1 and 10).",
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--backend",
+        choices=available_backends(),
+        help="HTML parser backend to benchmark (default: the configured one).",
+    )
+    options = parser.parse_args(arguments)
+
+    scales = options.scale or [1, 10]
+    if options.backend:
+        with use_backend(options.backend):
+            rows = run_suite(options.source, scales, options.repeats)
+    else:
+        rows = run_suite(options.source, scales, options.repeats)
+    print_rows(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
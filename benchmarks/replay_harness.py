@@ -0,0 +1,294 @@
+"""End-to-end replay of lambda_handler against local stand-ins for load testing.
+
+Usage: python -m benchmarks.replay_harness [--scale N ...] [--runs N]
+           [--slow HOST=SECONDS ...] [--fail HOST=STATUS|reset ...]
+           [--sources NAME,NAME] [--seed-baseline] [--json]
+
+Every site is served from the recorded fixtures by a local HTTP server, S3 is
+replaced by an in-memory store with the same API, and Google Chat posts are
+captured by a local webhook sink. Each configuration (one per --scale) starts
+from an empty store and runs the handler --runs times, so later runs show the
+warm HTTP cache and snapshot diffing. Reported per run: end-to-end latency,
+HTTP requests by host and status, S3 calls by operation, and chat messages.
+"""
+
+import argparse
+import calendar
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from unittest import mock
+
+import lambda_function
+from benchmarks.LocalS3Manager import LocalS3Manager
+from benchmarks.parser_benchmark import load_fixture
+from benchmarks.ReplayServer import HostBehaviour, ReplayAdapter, ReplayServer
+from utils.calendar_window import rolling_window
+from utils.http_session import set_adapter_factory
+from utils.S3Manager import S3Manager
+
+BUCKET_NAME = "jetaa-events"
+SNAPSHOT_PREFIX = "as-json"
+# Covers any CALENDAR_MONTHS_AHEAD up to two years, and CALENDAR_MONTHS_BEHIND
+# up to one
+RECORDED_MONTHS_AHEAD = 23
+RECORDED_MONTHS_BEHIND = 12
+
+
+class ReplayContext:
+    """Minimal Lambda context giving the handler its remaining time."""
+
+    def __init__(self, timeout_seconds=900):
+        self.deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self):
+        return int(max(self.deadline - time.monotonic(), 0) * 1000)
+
+
+def build_recordings(
+    scale=1, months_ahead=RECORDED_MONTHS_AHEAD, months_behind=RECORDED_MONTHS_BEHIND
+):
+    """Returns (recordings, prefix recordings) for every source's URLs.
+
+    Listing pages are the fixtures scaled by ``scale``. JETAA month pages are
+    recorded for the rolling window from ``months_behind`` before the current
+    month to ``months_ahead`` after it. They and the Japan Society listing pages
+    are rewritten so each has its own event URLs.
+    """
+    recordings = {}
+
+    jetaa_month = load_fixture("jetaa/calendar_month.html", scale)
+    for year, month in rolling_window(months_ahead, months_behind=months_behind):
+        recordings[
+            f"https://www.jetaa.org.uk/events/events-calendar/{year}/{month}/"
+        ] = (
+            jetaa_month.replace("March", calendar.month_name[month])
+            .replace("2025", str(year))
+            .replace(f"/{year}/3/", f"/{year}/{month}/")
+        )
+
+    recordings["https://www.japanhouselondon.uk/whats-on/"] = load_fixture(
+        "japan_house/whats_on.html", scale
+    )
+
+    japan_society_listing = load_fixture("japan_society/listing.html", scale)
+    recordings["https://www.japansociety.org.uk/events"] = japan_society_listing
+    for page in range(3):
+        recordings[
+            f"https://www.japansociety.org.uk/events?eventcat=0&eventpage={page}"
+        ] = japan_society_listing.replace(
+            "https://www.japansociety.org.uk/events/",
+            f"https://www.japansociety.org.uk/events/page{page}-",
+        )
+
+    recordings["https://www.jpf.org.uk/whatson.php"] = load_fixture(
+        "japan_foundation/whatson.html", scale
+    )
+    recordings["https://dajf.org.uk/events"] = load_fixture(
+        "daiwa_foundation/listing.html", scale
+    )
+
+    prefix_recordings = {
+        "https://www.japansociety.org.uk/events/": load_fixture(
+            "japan_society/detail.html"
+        ),
+        "https://dajf.org.uk/events/": load_fixture("daiwa_foundation/detail.html"),
+    }
+    return recordings, prefix_recordings
+
+
+def seed_empty_baseline(s3_manager):
+    """Stores an empty previous snapshot, so every replayed event counts as new."""
+    snapshot_key = S3Manager.build_snapshot_key(
+        SNAPSHOT_PREFIX, datetime.now() - timedelta(days=1)
+    )
+    empty_snapshot = {
+        source_name: [] for source_name in lambda_function.group_events_by_source([])
+    }
+    s3_manager.upload_snapshot_to_s3(empty_snapshot, BUCKET_NAME, snapshot_key)
+    s3_manager.update_latest_manifest(BUCKET_NAME, SNAPSHOT_PREFIX, snapshot_key)
+
+
+@contextmanager
+def replay_environment(environment):
+    """Temporarily sets environment variables, restoring the previous values."""
+    previous_values = {name: os.environ.get(name) for name in environment}
+    os.environ.update(environment)
+    try:
+        yield
+    finally:
+        for name, previous_value in previous_values.items():
+            if previous_value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = previous_value
+
+
+def run_configuration(
+    scale=1,
+    runs=1,
+    host_behaviours=None,
+    sources=None,
+    seed_baseline=False,
+    source_timeout_seconds=120,
+):
+    """Replays the handler ``runs`` times against one configuration.
+
+    Returns one report per run.
+    """
+    recordings, prefix_recordings = build_recordings(scale)
+    server = ReplayServer(recordings, prefix_recordings, host_behaviours).start()
+    s3_manager = LocalS3Manager()
+    if seed_baseline:
+        seed_empty_baseline(s3_manager)
+
+    reports = []
+    set_adapter_factory(
+        lambda pool_maxsize: ReplayAdapter(
+            server.base_url, pool_connections=pool_maxsize, pool_maxsize=pool_maxsize
+        )
+    )
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir, replay_environment(
+            {
+                "GOOGLE_CHAT_WEBHOOK_URL": server.webhook_url,
+                "HTTP_CACHE_LOCAL_PATH": os.path.join(cache_dir, "http_cache.json"),
+                "SOURCE_TIMEOUT_SECONDS": str(source_timeout_seconds),
+                "EVENT_SOURCES": ",".join(sources or []),
+                # No weekday matches, so the weekly scan stays out of the timing
+                "DAY_NUMBER": "7",
+                # The recordings are fixed in time, so their events may have ended
+                "PRUNE_PAST_EVENTS": "false",
+            }
+        ), mock.patch.object(lambda_function, "create_s3_manager", lambda: s3_manager):
+            for run in range(1, runs + 1):
+                server.reset_stats()
+                s3_manager.s3_resource.reset_stats()
+
+                started = time.perf_counter()
+                response = lambda_function.lambda_handler(None, ReplayContext())
+                latency_seconds = time.perf_counter() - started
+
+                reports.append(
+                    {
+                        "scale": scale,
+                        "run": run,
+                        "latency_seconds": latency_seconds,
+                        "http": server.stats(),
+                        "s3": s3_manager.s3_resource.stats(),
+                        "delivery": response.get("delivery_stats", {}),
+                    }
+                )
+    finally:
+        set_adapter_factory(None)
+        server.stop()
+    return reports
+
+
+def _parse_host_options(values, parse_value):
+    host_options = {}
+    for value in values or []:
+        host, _, option = value.partition("=")
+        host_options[host] = parse_value(option)
+    return host_options
+
+
+def print_reports(reports):
+    print(
+        f"{'scale':>5} {'run':>3} {'latency s':>9} {'http':>5} {'304':>4} "
+        f"{'errors':>6} {'s3 calls':>8} {'s3 get/put/list':>15} {'chat msgs':>9} "
+        f"{'cards':>5}"
+    )
+    for report in reports:
+        statuses = report["http"]["responses_by_status"]
+        s3_calls = report["s3"]["calls"]
+        errors = sum(count for status, count in statuses.items() if status >= 400)
+        s3_breakdown = (
+            f"{s3_calls.get('GetObject', 0)}/{s3_calls.get('PutObject', 0)}/"
+            f"{s3_calls.get('ListObjects', 0)}"
+        )
+        print(
+            f"{report['scale']:>5} {report['run']:>3} "
+            f"{report['latency_seconds']:>9.2f} {report['http']['requests']:>5} "
+            f"{statuses.get(304, 0):>4} {errors:>6} "
+            f"{sum(s3_calls.values()):>8} {s3_breakdown:>15} "
+            f"{report['http']['webhook_messages']:>9} "
+            f"{report['http']['webhook_cards']:>5}"
+        )
+
+
+def main(arguments):
+    parser = argparse.ArgumentParser(
+        description="Replay lambda_handler offline against recorded sites."
+    )
+    parser.add_argument(
+        "--scale",
+        action="append",
+        type=int,
+        help="Fixture scale of one configuration (repeatable, default 1).",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=2, help="Handler invocations per configuration."
+    )
+    parser.add_argument(
+        "--slow",
+        action="append",
+        metavar="HOST=SECONDS",
+        help="Delay every response from HOST.",
+    )
+    parser.add_argument(
+        "--fail",
+        action="append",
+        metavar="HOST=STATUS",
+        help="Answer HOST with STATUS, or 'reset' to drop the connection.",
+    )
+    parser.add_argument(
+        "--sources", help="Comma-separated sources to run, e.g. JETAA,JAPAN_HOUSE."
+    )
+    parser.add_argument(
+        "--seed-baseline",
+        action="store_true",
+        help="Start from an empty snapshot so every event is notified.",
+    )
+    parser.add_argument("--source-timeout", type=float, default=120)
+    parser.add_argument("--json", action="store_true", help="Print JSON reports.")
+    parser.add_argument("--log-level", default="WARNING")
+    options = parser.parse_args(arguments)
+
+    logging.getLogger().setLevel(options.log_level.upper())
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(options.log_level.upper())
+
+    host_behaviours = {}
+    for host, delay_seconds in _parse_host_options(options.slow, float).items():
+        host_behaviours[host] = HostBehaviour(delay_seconds=delay_seconds)
+    for host, fail_status in _parse_host_options(options.fail, str).items():
+        host_behaviours.setdefault(host, HostBehaviour()).fail_status = fail_status
+
+    reports = []
+    for scale in options.scale or [1]:
+        reports.extend(
+            run_configuration(
+                scale=scale,
+                runs=options.runs,
+                host_behaviours=host_behaviours,
+                sources=options.sources.split(",") if options.sources else None,
+                seed_baseline=options.seed_baseline,
+                source_timeout_seconds=options.source_timeout,
+            )
+        )
+
+    if options.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print_reports(reports)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,33 +1,59 @@
 import logging
+from functools import partial
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+
+from fetchers.HtmlParser import class_pattern, make_soup
+from utils.concurrency import ordered_map
+from utils.Event import Event
+from utils.http_session import get_session
+from utils.HttpCache import fetch_and_parse
+from utils.Metrics import increment
+from utils.SourceOrchestrator import SourceFetchError
 
 logger = logging.getLogger(__name__)
 
 
 class DaiwaFoundationEventFetcher:
-    def __init__(self):
+    # Bump when a parse method's output changes, so cached results are reparsed
+    PARSER_VERSION = 1
+    # The listing is parsed down to the event articles, detail pages down to
+    # the tags read for the title, date, location and image
+    LISTING_STRAINER = SoupStrainer("article", class_=class_pattern("event_listing"))
+    DETAIL_STRAINER = SoupStrainer(["h1", "p", "header", "img"])
+
+    def __init__(self, max_workers=4, request_timeout=30, http_cache=None):
         self.base_url = "https://dajf.org.uk/events"
         self.event_source = "daiwa_foundation"
         self.events_data = []
-
-    def _fetch_page_content(self, url):
+        # Upper bound on detail pages fetched at the same time
+        self.max_workers = max_workers
+        self.request_timeout = request_timeout
+        self.session = get_session("daiwa_foundation", pool_maxsize=max(max_workers, 1))
+        self.http_cache = http_cache
+
+    def _fetch_and_parse(self, url, parse):
+        """Returns ``parse`` applied to the page at ``url``; fetch errors are re-raised."""
         logger.info(f"Attempting to fetch page content from {url}")
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            logger.info(
-                f"Successfully fetched content from {url} with status code {response.status_code}"
+            parsed = fetch_and_parse(
+                self.session,
+                url,
+                parse,
+                self.http_cache,
+                timeout=self.request_timeout,
             )
-            return response.text
+            logger.info(f"Successfully fetched content from {url}")
+            return parsed
         except requests.RequestException as e:
             logger.error(f"Error fetching page content from {url}: {e}")
-            return None
+            increment("fetch_errors")
+            raise
 
     def _extract_event_links(self, html_content):
         logger.info("Extracting event links from the main page...")
-        soup = BeautifulSoup(html_content, "html.parser")
+        soup = make_soup(html_content, parse_only=self.LISTING_STRAINER)
         event_links = []
         # Find all event links on the main page
         for event in soup.select("article.event_listing h2.listing_title a"):
@@ -36,8 +62,8 @@ class DaiwaFoundationEventFetcher:
         return event_links
 
     def _extract_event_details(self, event_page_content, event_url):
-        logger.info(f"Extracting details from event page: {event_url}")
-        soup = BeautifulSoup(event_page_content, "html.parser")
+        logger.debug("Extracting details from event page: %s", event_url)
+        soup = make_soup(event_page_content, parse_only=self.DETAIL_STRAINER)
         try:
             # Extract event name
             event_name_tag = soup.find("h1", id="no_rule")
@@ -76,46 +102,51 @@ class DaiwaFoundationEventFetcher:
                 else (event_date_time, "Not available")
             )
 
-            event_details = {
-                "event_source": self.event_source,
-                "event_name": event_name,
-                "event_location": event_location,
-                "event_date": event_date,
-                "event_time": event_time,
-                "event_price": "Not available",  # Placeholder if price is not found
-                "event_url": event_url,
-                "event_image_url": event_image_url,
-            }
-            logger.info(f"Successfully extracted event: {event_name}")
+            event_details = Event(
+                event_source=self.event_source,
+                event_name=event_name,
+                event_location=event_location,
+                event_date=event_date,
+                event_time=event_time,
+                event_price="Not available",  # Placeholder if price is not found
+                event_url=event_url,
+                event_image_url=event_image_url,
+            )
+            logger.debug("Successfully extracted event: %s", event_name)
             return event_details
         except AttributeError as e:
             logger.error(f"Error extracting event details from {event_url}: {e}")
             return None
 
+    def _fetch_event_details(self, event_link):
+        logger.debug("Fetching event details from %s", event_link)
+        return self._fetch_and_parse(
+            event_link,
+            partial(self._extract_event_details, event_url=event_link),
+        )
+
     def combine_and_return_events(self):
         logger.info(f"Starting event scraping for {self.event_source}...")
-        html_content = self._fetch_page_content(self.base_url)
-        if not html_content:
-            logger.error("No HTML content to parse.")
-            return []
-
-        event_links = self._extract_event_links(html_content)
+        # A listing or detail page that cannot be fetched fails the whole source,
+        # rather than returning a partial listing
+        event_links = self._fetch_and_parse(self.base_url, self._extract_event_links)
         if not event_links:
             logger.warning("No event links found on the main page.")
 
-        for event_link in event_links:
-            logger.info(f"Fetching event details from {event_link}")
-            event_page_content = self._fetch_page_content(event_link)
-            if event_page_content:
-                event_details = self._extract_event_details(
-                    event_page_content, event_link
-                )
-                if event_details:
-                    self.events_data.append(event_details)
-
-        if not self.events_data:
+        # Detail pages are fetched concurrently; results keep the listing order
+        self.events_data = [
+            event_details
+            for event_details in ordered_map(
+                self._fetch_event_details, event_links, self.max_workers
+            )
+            if event_details
+        ]
+
+        if event_links and not self.events_data:
             logger.error(f"No events found for {self.event_source}.")
-            return []
+            raise SourceFetchError(
+                f"None of the {len(event_links)} event pages could be parsed"
+            )
 
         logger.info(f"Scraping complete. Found {len(self.events_data)} events.")
         return self.events_data
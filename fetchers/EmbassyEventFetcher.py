@@ -1,9 +1,15 @@
 import logging
 from random import choice
-from time import sleep
 
 import requests
-from bs4 import BeautifulSoup
+
+from fetchers.HtmlParser import make_soup
+from utils.calendar_window import calendar_months
+from utils.Event import Event
+from utils.http_session import get_session
+from utils.HttpCache import fetch_and_parse
+from utils.log_utils import debug_sampled
+from utils.RequestScheduler import HostPolicy
 
 # from utils.SlackManager import SlackManager
 
@@ -11,10 +17,28 @@ logger = logging.getLogger(__name__)
 
 
 class EmbassyEventFetcher:
-    def __init__(self, year):
+    # Bump when a parse method's output changes, so cached results are reparsed
+    PARSER_VERSION = 1
+    HOST = "www.uk.emb-japan.go.jp"
+    # One request at a time, 2-5s apart, as the previous fixed sleeps spaced them
+    REQUEST_POLICY = HostPolicy(
+        requests_per_second=0.5, max_concurrency=1, jitter_seconds=3
+    )
+
+    def __init__(
+        self,
+        year=None,
+        request_timeout=30,
+        http_cache=None,
+        months_ahead=None,
+        month_cache=None,
+        months_behind=None,
+        request_policy=None,
+    ):
         self.base_url = "https://www.uk.emb-japan.go.jp/JAPANUKEvent/event/"
         self.year = year
-        self.short_year = str(year)[2:]
+        # Without a fixed year, the window rolls with the current month
+        self.months = calendar_months(year, months_ahead, months_behind=months_behind)
         # self.slack_manager = SlackManager()
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3",
@@ -23,14 +47,23 @@ class EmbassyEventFetcher:
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.163 Safari/537.36",
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/79.0.3945.88 Safari/537.36",
         ]
-        self.session = requests.Session()
+        self.request_timeout = request_timeout
+        self.session = get_session(
+            "embassy",
+            pool_maxsize=1,
+            host_policies={self.HOST: request_policy or self.REQUEST_POLICY},
+        )
+        self.http_cache = http_cache
+        # Fresh months come from the cache; a month that is over is frozen and
+        # not requested again
+        self.month_cache = month_cache
 
     def combine_and_return_events(self):
         events = []
-        for month in range(1, 13):
-            logger.debug(f"Fetching events for {month}/{self.year}")
+        for year, month in self.months:
+            logger.debug(f"Fetching events for {month}/{year}")
             month_str = str(month).zfill(2)
-            url = f"{self.base_url}eve-list{self.short_year}-{month_str}.html"
+            url = f"{self.base_url}eve-list{str(year)[2:]}-{month_str}.html"
             logger.debug(f"URL: {url}")
             headers = {
                 "User-Agent": choice(self.user_agents),
@@ -52,33 +85,37 @@ class EmbassyEventFetcher:
                 "CookieName2": "CookieValue2",
             }
 
-            try:
-                response = self.session.get(
-                    url, headers=headers, proxies=proxies, cookies=cookies
+            def fetch_month():
+                return fetch_and_parse(
+                    self.session,
+                    url,
+                    self._parse_month_events,
+                    self.http_cache,
+                    decode=self._decode_response,
+                    headers=headers,
+                    proxies=proxies,
+                    cookies=cookies,
+                    timeout=self.request_timeout,
                 )
-                if response.status_code == 200:
-                    response.encoding = (
-                        "utf-8"
-                        if response.encoding is None
-                        or response.encoding == "ISO-8859-1"
-                        else response.encoding
-                    )
-                    soup = BeautifulSoup(response.text, "html.parser")
-                    event_blocks = soup.findAll("div", class_="card-wrapper")
-                    for block in event_blocks:
-                        event_info = self._extract_event_info(block)
-                        if event_info:
-                            events.append(event_info)
+
+            try:
+                if self.month_cache is None:
+                    events.extend(fetch_month())
                 else:
-                    logger.error(
-                        f"Failed to retrieve the webpage for {month_str}/{self.year}. Status code: {response.status_code}"
+                    events.extend(
+                        self.month_cache.get_or_fetch(
+                            "embassy", year, month, fetch_month
+                        )
                     )
+            except requests.exceptions.HTTPError as e:
+                logger.error(
+                    f"Failed to retrieve the webpage for {month_str}/{year}. Status code: {e.response.status_code}"
+                )
             except requests.exceptions.RequestException as e:
                 logger.error(
-                    f"An error occurred while fetching the events for {month_str}/{self.year}: {e}"
+                    f"An error occurred while fetching the events for {month_str}/{year}: {e}"
                 )
                 continue
-            sleep(choice(range(2, 6)))  # Random sleep between 1 to 3 seconds
 
         # if not events:
         #     logger.error("Issue with Embassy event fetcher, no events found")
@@ -88,13 +125,33 @@ class EmbassyEventFetcher:
 
         return events
 
+    @staticmethod
+    def _decode_response(response):
+        response.encoding = (
+            "utf-8"
+            if response.encoding is None or response.encoding == "ISO-8859-1"
+            else response.encoding
+        )
+        return response.text
+
+    def _parse_month_events(self, html_content):
+        month_events = []
+        soup = make_soup(html_content)
+        event_blocks = soup.findAll("div", class_="card-wrapper")
+        for block in event_blocks:
+            event_info = self._extract_event_info(block)
+            if event_info:
+                month_events.append(event_info)
+        return month_events
+
     def _extract_event_info(self, block):
         try:
             event_url_suffix = block.find("a")["href"]
             event_url = self.base_url + event_url_suffix
             event_name = block.find("h4", class_="card-title").text.strip()
+            # lxml turns the page's CRLF line breaks into LF, html.parser keeps them
             date_location_str = (
-                block.find("p", class_="mbr-text").text.strip().split("\r\n")
+                block.find("p", class_="mbr-text").text.strip().splitlines()
             )
             event_date = date_location_str[0].strip()
             event_location = (
@@ -108,20 +165,20 @@ class EmbassyEventFetcher:
             logger.error(f"Error extracting event info from block: {extraction_error}")
             return False
 
-        event_details = {
-            "event_source": "embassy",
-            "event_location": event_location,
-            "event_time": event_time,
-            "event_price": event_price,
-            "event_url": event_url,
-            "event_date": event_date,
-            "event_name": event_name,
-        }
-        logger.debug(f"Event details: {event_details}")
+        event_details = Event(
+            event_source="embassy",
+            event_location=event_location,
+            event_time=event_time,
+            event_price=event_price,
+            event_url=event_url,
+            event_date=event_date,
+            event_name=event_name,
+        )
+        debug_sampled(logger, "Event details: %s", event_details)
 
         return event_details
 
 
 if __name__ == "__main__":
-    embassyeventfetcher = EmbassyEventFetcher(2024)
+    embassyeventfetcher = EmbassyEventFetcher()
     print(embassyeventfetcher.combine_and_return_events())
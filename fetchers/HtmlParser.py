@@ -0,0 +1,218 @@
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "html.parser"
+BACKEND_ENV_VAR = "HTML_PARSER_BACKEND"
+
+# Backend name to the BeautifulSoup tree builder it uses. Every backend yields a
+# BeautifulSoup tree, so the fetchers' find/select calls run unchanged on it.
+BACKEND_BUILDERS = {
+    "html.parser": "html.parser",
+    "lxml": "lxml",
+}
+
+_backend_override = None
+_partial_parsing = True
+_timings_lock = threading.Lock()
+_parse_timings = {}
+
+
+def _backend_available(backend):
+    if backend == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            return False
+    return backend in BACKEND_BUILDERS
+
+
+def available_backends():
+    return [backend for backend in BACKEND_BUILDERS if _backend_available(backend)]
+
+
+def get_backend():
+    """Returns the configured backend, falling back to html.parser if unavailable."""
+    backend = _backend_override or os.environ.get(BACKEND_ENV_VAR, DEFAULT_BACKEND)
+    if not _backend_available(backend):
+        logger.warning(
+            f"HTML parser backend {backend} is not available, using {DEFAULT_BACKEND}"
+        )
+        return DEFAULT_BACKEND
+    return backend
+
+
+@contextmanager
+def use_backend(backend):
+    """Temporarily forces a backend, e.g. to compare backends on the same page."""
+    global _backend_override
+    previous_backend = _backend_override
+    _backend_override = backend
+    try:
+        yield
+    finally:
+        _backend_override = previous_backend
+
+
+@contextmanager
+def full_document_parsing():
+    """Temporarily ignores extraction plans, building complete trees instead.
+
+    Used to check that a fetcher's strainers extract the same events as a full
+    parse of the page.
+    """
+    global _partial_parsing
+    previous_partial_parsing = _partial_parsing
+    _partial_parsing = False
+    try:
+        yield
+    finally:
+        _partial_parsing = previous_partial_parsing
+
+
+def _record_parse(backend, elapsed):
+    with _timings_lock:
+        backend_timings = _parse_timings.setdefault(
+            backend, {"parses": 0, "seconds": 0.0}
+        )
+        backend_timings["parses"] += 1
+        backend_timings["seconds"] += elapsed
+
+
+def make_soup(markup, parse_only=None):
+    """Parses ``markup`` with the configured backend and records the parse time.
+
+    ``parse_only`` is a SoupStrainer describing the subtrees a fetcher reads;
+    only those are built, which keeps the tree small on large pages.
+    """
+    backend = get_backend()
+    if not _partial_parsing:
+        parse_only = None
+    started = time.perf_counter()
+    soup = BeautifulSoup(markup, BACKEND_BUILDERS[backend], parse_only=parse_only)
+    _record_parse(backend, time.perf_counter() - started)
+    return soup
+
+
+def class_pattern(*class_names):
+    """Returns a pattern matching a class attribute holding any of ``class_names``.
+
+    SoupStrainer sees the raw attribute while parsing, e.g. "card mb-2", so a
+    plain class name would only match elements carrying that single class.
+    """
+    alternatives = "|".join(re.escape(class_name) for class_name in class_names)
+    return re.compile(rf"(?:^|\s)(?:{alternatives})(?:\s|$)")
+
+
+class _FirstTagFound(Exception):
+    pass
+
+
+class _FirstTagParser(HTMLParser):
+    """Tokenizer that stops at the first start tag named ``tag_name``."""
+
+    def __init__(self, tag_name):
+        super().__init__()
+        self.tag_name = tag_name
+        self.attributes = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == self.tag_name:
+            # Later duplicates win, as they do in a BeautifulSoup tree
+            self.attributes = {name: value or "" for name, value in attrs}
+            raise _FirstTagFound
+
+    handle_startendtag = handle_starttag
+
+
+def find_first_tag_attributes(markup, tag_name):
+    """Returns the attributes of the first ``tag_name`` tag, or None if absent.
+
+    Tokenizes ``markup`` without building a tree and stops as soon as the tag is
+    seen, for pages where a single attribute holds everything a fetcher needs.
+    """
+    if not _partial_parsing:
+        tag = make_soup(markup).find(tag_name)
+        if tag is None:
+            return None
+        # Multi-valued attributes such as class come back as lists from bs4
+        return {
+            name: " ".join(value) if isinstance(value, list) else value
+            for name, value in tag.attrs.items()
+        }
+
+    if isinstance(markup, bytes):
+        markup = markup.decode("utf-8", errors="replace")
+    parser = _FirstTagParser(tag_name.lower())
+    started = time.perf_counter()
+    try:
+        parser.feed(markup)
+        parser.close()
+    except _FirstTagFound:
+        pass
+    _record_parse("stream", time.perf_counter() - started)
+    return parser.attributes
+
+
+def parse_timings():
+    """Returns per-backend parse counts and total seconds since the last reset."""
+    with _timings_lock:
+        return {
+            backend: dict(backend_timings)
+            for backend, backend_timings in _parse_timings.items()
+        }
+
+
+def reset_parse_timings():
+    with _timings_lock:
+        _parse_timings.clear()
+
+
+def _compare_runs(markup, extract, runs):
+    """Runs ``extract(markup)`` under each (name, context) pair and compares outputs."""
+    results = {}
+    for run_name, run_context in runs:
+        with run_context:
+            started = time.perf_counter()
+            output = extract(markup)
+            results[run_name] = {
+                "output": output,
+                "seconds": time.perf_counter() - started,
+            }
+
+    reference_output = next(iter(results.values()))["output"]
+    return {
+        "results": results,
+        "identical": all(
+            result["output"] == reference_output for result in results.values()
+        ),
+    }
+
+
+def compare_backends(markup, extract, backends=None):
+    """Runs ``extract(markup)`` under each backend and reports output parity.
+
+    Returns a dict with each backend's output and time, and whether every
+    backend produced the same output as the first one.
+    """
+    backends = backends or available_backends()
+    return _compare_runs(
+        markup, extract, [(backend, use_backend(backend)) for backend in backends]
+    )
+
+
+def compare_extraction_plans(markup, extract):
+    """Runs ``extract(markup)`` with and without partial parsing and compares them."""
+    return _compare_runs(
+        markup,
+        extract,
+        [("partial", nullcontext()), ("full", full_document_parsing())],
+    )
@@ -1,7 +1,16 @@
 import logging
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+
+from fetchers.HtmlParser import class_pattern, make_soup
+from utils.calendar_window import calendar_months
+from utils.concurrency import ordered_map
+from utils.Event import Event
+from utils.http_session import get_session
+from utils.HttpCache import fetch_and_parse
+from utils.log_utils import debug_sampled
+from utils.Metrics import increment
 
 # from utils.SlackManager import SlackManager
 
@@ -9,30 +18,80 @@ logger = logging.getLogger(__name__)
 
 
 class JETAAEventFetcher:
-    def __init__(self, year):
+    # Bump when a parse method's output changes, so cached results are reparsed
+    PARSER_VERSION = 1
+    # Calendar pages are parsed down to the month heading and the event cells
+    CALENDAR_STRAINER = SoupStrainer(
+        ["h2", "td"], class_=class_pattern("currentmonth", "containsevent")
+    )
+
+    def __init__(
+        self,
+        year=None,
+        max_workers=1,
+        request_timeout=30,
+        http_cache=None,
+        months_ahead=None,
+        month_cache=None,
+        months_behind=None,
+    ):
         self.BASE_URL = "https://www.jetaa.org.uk/"
         self.EVENTS_PREFIX = "events/events-calendar/"
         self.year = year
+        # Without a fixed year, the window rolls with the current month
+        self.months = calendar_months(year, months_ahead, months_behind=months_behind)
         self.events = []
         self.event_source = "jetaa"
+        # max_workers > 1 enables the concurrent calendar mode
+        self.max_workers = max_workers
+        self.request_timeout = request_timeout
+        self.session = get_session("jetaa", pool_maxsize=max(max_workers, 1))
+        self.http_cache = http_cache
+        # Fresh months come from the cache; a month that is over is frozen and
+        # not requested again
+        self.month_cache = month_cache
         # self.slack_manager = SlackManager()
 
-    def fetch_events(self, url):
+    def _fetch_page(self, url):
+        # Raises HTTPError for bad responses
+        return fetch_and_parse(
+            self.session,
+            url,
+            self.parse_events,
+            self.http_cache,
+            timeout=self.request_timeout,
+        )
+
+    def fetch_events(self, url, year=None, month=None):
+        """Fetches and parses a single calendar page, returning its events.
+
+        With a month cache, the page of ``year``/``month`` is only requested
+        when the cache has no usable entry for it.
+        """
         try:
-            response = requests.get(url)
-            response.raise_for_status()  # Raises HTTPError for bad responses
-            self.parse_events(response.text)
-        except requests.HTTPError as fetch_error:
+            if self.month_cache is not None and year is not None:
+                return self.month_cache.get_or_fetch(
+                    self.event_source, year, month, lambda: self._fetch_page(url)
+                )
+            return self._fetch_page(url)
+        except requests.RequestException as fetch_error:
+            # A missing month fails the whole window rather than dropping its events
             logger.error(f"Failed to retrieve webpage: {fetch_error}")
+            increment("fetch_errors")
+            raise
 
     def parse_events(self, html_content):
-        soup = BeautifulSoup(html_content, "html.parser")
+        soup = make_soup(html_content, parse_only=self.CALENDAR_STRAINER)
         current_month_year = soup.find("h2", class_="currentmonth").text.strip()
         logger.debug(f"Processing events for: {current_month_year}")
         events = soup.find_all("td", class_="containsevent")
 
+        month_events = []
         for event in events:
-            self.process_event(event, current_month_year)
+            event_dict = self.process_event(event, current_month_year)
+            if event_dict:
+                month_events.append(event_dict)
+        return month_events
 
     def process_event(self, event, current_month_year):
         day = event.find("h4").text.strip() if event.find("h4") else "Unknown day"
@@ -60,37 +119,43 @@ class JETAAEventFetcher:
 
             event_location = "Not Available"
 
-            logger.debug(f"Event host: {self.event_source}")
-            logger.debug(f"Event name: {event_name}")
-            logger.debug(f"Event location: {event_location}")
-            logger.debug(f"Event date: {event_date}")
-            logger.debug(f"Event time: {event_time}")
-            logger.debug(f"Event price: {event_price}")
-            logger.debug(f"Event URL: {event_url}")
-
-            self.events.append(
-                {
-                    "event_source": self.event_source,
-                    "event_name": event_name,
-                    "event_location": event_location,
-                    "event_date": event_date,
-                    "event_time": event_time,
-                    "event_price": event_price,
-                    "event_url": event_url,
-                    "event_image_url": "https://www.jetaa.org.uk/site/assets/files/1021/logo.460x0.png",
-                }
+            debug_sampled(
+                logger,
+                "JETAA event: %s on %s at %s (%s) %s",
+                event_name,
+                event_date,
+                event_time,
+                event_price,
+                event_url,
+            )
+
+            return Event(
+                event_source=self.event_source,
+                event_name=event_name,
+                event_location=event_location,
+                event_date=event_date,
+                event_time=event_time,
+                event_price=event_price,
+                event_url=event_url,
+                event_image_url="https://www.jetaa.org.uk/site/assets/files/1021/logo.460x0.png",
             )
+        return None
+
+    def _fetch_month_events(self, year_month):
+        year, month = year_month
+        url = f"{self.BASE_URL}{self.EVENTS_PREFIX}{year}/{month}/"
+        logger.debug("Processing month: %s/%s", month, year)
+        return self.fetch_events(url, year, month)
 
     def jetaa_calendar_events_processor(self):
-        self.events.clear()  # Clear existing events before processing a new year
-        try:
-            for month in range(1, 13):
-                url = f"{self.BASE_URL}{self.EVENTS_PREFIX}{self.year}/{month}/"
-                logger.debug(f"\nProcessing month: {month}")
-                self.fetch_events(url)
-        except Exception as monthly_processor_error:
-            logger.error(f"Error: {monthly_processor_error}")
-            return []
+        self.events.clear()  # Clear existing events before processing a new window
+        # Months are parsed independently and merged back in calendar order
+        monthly_events = ordered_map(
+            self._fetch_month_events, self.months, self.max_workers
+        )
+
+        for month_events in monthly_events:
+            self.events.extend(month_events)
 
         # if self.events == []:
         #     self.slack_manager.send_error_message(
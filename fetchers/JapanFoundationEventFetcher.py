@@ -2,74 +2,119 @@ import logging
 import pprint
 import re
 
-import requests
-from bs4 import BeautifulSoup
+from fetchers.HtmlParser import make_soup
+from utils.Event import Event
+from utils.http_session import get_session
+from utils.HttpCache import fetch_and_parse
+from utils.SourceOrchestrator import SourceFetchError
 
 # from utils.SlackManager import SlackManager
 
 logger = logging.getLogger(__name__)
 
+DATE_PATTERN = re.compile(r"\d{1,2}\s+[A-Za-z]+\s+\d{4}")
+EVENT_BLOCK_STYLE = "border: solid 1px #666666;"
+
 
 class JapanFoundationEventFetcher:
-    def __init__(self):
+    # Bump when a parse method's output changes, so cached results are reparsed
+    PARSER_VERSION = 1
+
+    def __init__(self, request_timeout=30, http_cache=None):
         self.base_url = "https://www.jpf.org.uk"
         self.whatson_url = f"{self.base_url}/whatson.php"
+        self.request_timeout = request_timeout
+        self.session = get_session("japan_foundation", pool_maxsize=1)
+        self.http_cache = http_cache
         # self.slack_manager = SlackManager()
 
-    def _fetch_webpage_content(self):
-        response = requests.get(self.whatson_url)
-        response.raise_for_status()  # Ensure we raise an error for bad responses
-        return response.text
-
     @staticmethod
     def _extract_date_info(text):
-        pattern = r"\d{1,2}\s+[A-Za-z]+\s+\d{4}"
-        dates = re.findall(pattern, text)
+        dates = DATE_PATTERN.findall(text)
         return " - ".join(dates) if dates else "Date Info Not Found"
 
     def combine_and_return_events(self):
-        webpage_content = self._fetch_webpage_content()
-        soup = BeautifulSoup(webpage_content, "html.parser")
+        # Ensure we raise an error for bad responses
+        return fetch_and_parse(
+            self.session,
+            self.whatson_url,
+            self._parse_events,
+            self.http_cache,
+            timeout=self.request_timeout,
+        )
+
+    @staticmethod
+    def _event_blocks_with_anchors(soup):
+        """Yields each event block with the closest preceding ``a[id]`` anchor.
+
+        Anchors and blocks are paired in one pass in document order, instead of
+        searching backwards from every block.
+        """
+        anchor_tag = None
+        for tag in soup.find_all(["a", "div"]):
+            if tag.name == "a":
+                if tag.get("id") is not None:
+                    anchor_tag = tag
+            elif tag.get("style") == EVENT_BLOCK_STYLE:
+                yield tag, anchor_tag
+
+    @staticmethod
+    def _scan_event_block(event_block):
+        """Finds the title, date, venue and image tags of a block in one walk.
+
+        Each field keeps the first matching tag in document order.
+        """
+        title_tag = date_info_tag = venue_td = image_tag = None
+        for tag in event_block.find_all(["font", "td", "img"]):
+            if tag.name == "font":
+                if title_tag is None and tag.get("color") == "#FFFFFF":
+                    title_tag = tag
+            elif tag.name == "td":
+                if date_info_tag is None and tag.get("width") == "100%":
+                    date_info_tag = tag
+                if venue_td is None and "Venue:" in tag.get_text():
+                    venue_td = tag
+            elif image_tag is None and tag.get("alt") == "":
+                image_tag = tag
+
+            if title_tag and date_info_tag and venue_td and image_tag:
+                break
+        return title_tag, date_info_tag, venue_td, image_tag
+
+    def _parse_events(self, webpage_content):
+        soup = make_soup(webpage_content)
         events = []
 
         try:
-            for event_block in soup.find_all("div", style="border: solid 1px #666666;"):
-                title_tag = event_block.find("font", color="#FFFFFF")
+            for event_block, anchor_tag in self._event_blocks_with_anchors(soup):
+                title_tag, date_info_tag, venue_td, img_tag = self._scan_event_block(
+                    event_block
+                )
                 title = (
                     title_tag.get_text(strip=True) if title_tag else "Title Not Found"
                 )
 
-                date_info_tag = event_block.find("td", width="100%")
                 date_info = (
                     self._extract_date_info(date_info_tag.get_text(strip=True))
                     if date_info_tag
                     else "Date Info Not Found"
                 )
 
-                venue = "Venue Not Found"
-                for td in event_block.find_all("td"):
-                    if "Venue:" in td.get_text():
-                        venue = td.find_next_sibling("td").get_text(strip=True)
-                        break
+                venue = (
+                    venue_td.find_next_sibling("td").get_text(strip=True)
+                    if venue_td
+                    else "Venue Not Found"
+                )
 
-                # Find the correct image URL by looking for images with alt=""
+                # The event image is the first one with an empty alt text
                 image_url = "Image Not Found"
-                for img_tag in event_block.find_all("img"):
-                    if "alt" in img_tag.attrs and img_tag["alt"] == "":
-                        if img_tag["src"].startswith("http"):
-                            image_url = img_tag["src"]
-                        else:
-                            image_url = (
-                                f"{self.base_url}/{img_tag['src'].lstrip('../')}"
-                            )
-                        break
-
-                anchor_tag = event_block.find_previous("a", id=True)
-                event_id = (
-                    anchor_tag["id"]
-                    if anchor_tag and "id" in anchor_tag.attrs
-                    else None
-                )
+                if img_tag:
+                    if img_tag["src"].startswith("http"):
+                        image_url = img_tag["src"]
+                    else:
+                        image_url = f"{self.base_url}/{img_tag['src'].lstrip('../')}"
+
+                event_id = anchor_tag["id"] if anchor_tag else None
 
                 event_url = (
                     f"{self.whatson_url}#{event_id}"
@@ -77,22 +122,24 @@ class JapanFoundationEventFetcher:
                     else "URL Not Available"
                 )
 
-                output_item = {
-                    "event_source": "japan_foundation",
-                    "event_name": title,
-                    "event_location": venue,
-                    "event_date": date_info,
-                    "event_time": "Not available",
-                    "event_price": "Not available",
-                    "event_description": "Not available",
-                    "event_image_url": image_url,
-                    "event_url": event_url,
-                }
+                output_item = Event(
+                    event_source="japan_foundation",
+                    event_name=title,
+                    event_location=venue,
+                    event_date=date_info,
+                    event_time="Not available",
+                    event_price="Not available",
+                    event_description="Not available",
+                    event_image_url=image_url,
+                    event_url=event_url,
+                )
 
                 events.append(output_item)
         except Exception as page_check_error:
-            logger.debug(f"Error in Japan Foundation event fetcher: {page_check_error}")
-            return []
+            logger.error(f"Error in Japan Foundation event fetcher: {page_check_error}")
+            raise SourceFetchError(
+                f"Could not parse {self.whatson_url}: {page_check_error}"
+            ) from page_check_error
 
         # if not events:
         #     self.slack_manager.send_error_message(
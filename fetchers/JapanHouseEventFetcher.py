@@ -3,7 +3,14 @@ import logging
 import re
 
 import requests
-from bs4 import BeautifulSoup
+
+from fetchers.HtmlParser import find_first_tag_attributes
+from utils.Event import Event
+from utils.http_session import get_session
+from utils.HttpCache import fetch_and_parse
+from utils.log_utils import debug_sampled, summarize
+from utils.Metrics import increment
+from utils.SourceOrchestrator import SourceFetchError
 
 # from utils.SlackManager import SlackManager
 
@@ -11,49 +18,60 @@ logger = logging.getLogger(__name__)
 
 
 class JapanHouseEventFetcher:
-    def __init__(self):
+    # Bump when a parse method's output changes, so cached results are reparsed
+    PARSER_VERSION = 1
+
+    def __init__(self, request_timeout=30, http_cache=None):
         self.url = "https://www.japanhouselondon.uk/whats-on/"
         self.event_source = "japan_house"
         # self.slack_manager = SlackManager()
         self.events_data = []
+        self.request_timeout = request_timeout
+        self.session = get_session("japan_house", pool_maxsize=1)
+        self.http_cache = http_cache
 
-    def _fetch_page_content(self):
+    def _fetch_events(self):
+        """Returns the events parsed from the what's-on page; fetch errors are re-raised."""
         try:
-            response = requests.get(self.url)
             logger.debug(f"URL: {self.url}")
-            logger.debug(f"Status code: {response.status_code}")
-
-            if response.status_code == 200:
-                logger.debug("Successfully fetched the webpage content.")
-                return response.text
-            else:
-                logger.error(
-                    f"Failed to fetch the {self.event_source} webpage content. Status code: {response.status_code}"
-                )
-                # Send error message to Slack
-                # self.slack_manager.send_error_message(
-                #     f"Failed to fetch {self.event_source} webpage. Status code: {response.status_code}"
-                # )
-                return None
+            events = fetch_and_parse(
+                self.session,
+                self.url,
+                self._parse_page,
+                self.http_cache,
+                timeout=self.request_timeout,
+            )
+            logger.debug("Successfully fetched the webpage content.")
+            return events
+        except requests.exceptions.HTTPError as e:
+            logger.error(
+                f"Failed to fetch the {self.event_source} webpage content. Status code: {e.response.status_code}"
+            )
+            # Send error message to Slack
+            # self.slack_manager.send_error_message(
+            #     f"Failed to fetch {self.event_source} webpage. Status code: {e.response.status_code}"
+            # )
+            increment("fetch_errors")
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Network error occurred: {e}")
             # self.slack_manager.send_error_message(
             #     f"Network error fetching {self.event_source} events"
             # )
-            return None
+            increment("fetch_errors")
+            raise
 
     def _parse_events_from_vbind(self, html_content):
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        # Find the archive-whats-on component and its v-bind attribute
-        archive_whats_on = soup.find("archive-whats-on")
-        if archive_whats_on and "v-bind" in archive_whats_on.attrs:
+        # Only the archive-whats-on component's v-bind attribute is needed, so the
+        # page is tokenized up to that tag instead of being parsed into a tree
+        archive_whats_on = find_first_tag_attributes(html_content, "archive-whats-on")
+        if archive_whats_on and "v-bind" in archive_whats_on:
             vbind_content = archive_whats_on["v-bind"]
             # Replace HTML entities with actual quotes
             vbind_content = vbind_content.replace("&quot;", '"')
             try:
                 event_data_json = json.loads(vbind_content)
-                logger.debug(f"Extracted JSON: {event_data_json}")
+                logger.debug("Extracted JSON: %s", summarize(event_data_json))
                 return event_data_json
             except json.JSONDecodeError as e:
                 logger.error(f"Error decoding JSON from v-bind: {e}")
@@ -76,42 +94,36 @@ class JapanHouseEventFetcher:
                     image_url = re.sub(r"-\d+x\d+(?=\.\w{3,4}$)", "", image_url)
 
                 # Construct the event_dict with the original keys
-                event_dict = {
-                    "event_source": self.event_source,
-                    "event_name": post.get("title"),
-                    "event_location": post.get("event_location"),
-                    "event_date": post.get("date_range"),
-                    "event_time": "Not available",
-                    "event_price": "Not available",
-                    "event_url": post.get("url"),
-                    "event_image_url": image_url,
-                }
-
-                logger.debug(f"Extracted event: {event_dict}")
+                event_dict = Event(
+                    event_source=self.event_source,
+                    event_name=post.get("title"),
+                    event_location=post.get("event_location"),
+                    event_date=post.get("date_range"),
+                    event_time="Not available",
+                    event_price="Not available",
+                    event_url=post.get("url"),
+                    event_image_url=image_url,
+                )
+
+                debug_sampled(logger, "Extracted event: %s", event_dict)
                 extracted_events.append(event_dict)
         else:
             logger.error("No 'posts' data found in JSON.")
         return extracted_events
 
-    def combine_and_return_events(self):
-        html_content = self._fetch_page_content()
-
-        # If no content is fetched, send an error message to Slack and return
-        if not html_content:
-            logger.error("No HTML content to parse.")
-            self.slack_manager.send_error_message(
-                "Issue with Japan House event fetcher, no events found"
-            )
-            return []
-
+    def _parse_page(self, html_content):
         # Parse the v-bind JSON from the archive-whats-on component
         event_json = self._parse_events_from_vbind(html_content)
         if event_json is None:
             logger.error("Failed to parse events from JSON.")
-            return []
+            raise SourceFetchError(f"No event data found on {self.url}")
 
         # Extract event details from the parsed JSON
-        self.events_data = self._extract_event_details(event_json)
+        return self._extract_event_details(event_json)
+
+    def combine_and_return_events(self):
+        # Fetch and parse errors propagate, so the source is recorded as failed
+        self.events_data = self._fetch_events()
 
         # if not self.events_data:
         #     logger.error("Issue with Japan House event fetcher, no events found")
@@ -2,7 +2,15 @@ import json
 import logging
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+
+from fetchers.HtmlParser import class_pattern, make_soup
+from utils.concurrency import ordered_map
+from utils.Event import Event
+from utils.http_session import get_session
+from utils.HttpCache import fetch_and_parse
+from utils.log_utils import debug_sampled, payload
+from utils.Metrics import increment
 
 # from utils.SlackManager import SlackManager
 
@@ -10,44 +18,79 @@ logger = logging.getLogger(__name__)
 
 
 class JapanSocietyEventFetcher:
-    def __init__(self):
+    # Bump when a parse method's output changes, so cached results are reparsed
+    PARSER_VERSION = 1
+    # Listing pages are parsed down to the event cards and pagination links,
+    # detail pages down to their images
+    LISTING_STRAINER = SoupStrainer(
+        ["div", "a"], class_=class_pattern("card", "page-link")
+    )
+    DETAIL_STRAINER = SoupStrainer("img")
+
+    def __init__(self, max_workers=4, request_timeout=30, http_cache=None):
         self.base_url = "https://www.japansociety.org.uk/events"
-        self.session = requests.Session()
+        self.image_base_url = "https://www.japansociety.org.uk/"
+        self.max_workers = max_workers
+        self.request_timeout = request_timeout
+        self.session = get_session("japan_society", pool_maxsize=max(max_workers, 1))
+        self.http_cache = http_cache
         # self.slack_manager = SlackManager()
 
-    def _scrape_events_from_url(self, url, existing_events):
+    def _fetch_listing(self, url):
+        """Returns the events and pagination links of a listing page.
+
+        Fetch errors are re-raised: a missing listing page would otherwise drop
+        its events from the snapshot and notify them again once it is back.
+        """
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
+            listing = fetch_and_parse(
+                self.session,
+                url,
+                self._parse_listing,
+                self.http_cache,
+                timeout=self.request_timeout,
+            )
             logger.debug(f"Successfully fetched the webpage content from URL: {url}")
-
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            event_cards = soup.find_all("div", class_="card")
-            logger.debug(f"Number of event cards: {len(event_cards)}")
-
-            for card in event_cards:
-                event_details = self._extract_event_details(card)
-                if event_details:
-                    existing_events.append(event_details)
-                    logger.debug(f"Event details added: {event_details}")
+            return listing
         except Exception as scrape_error:
             logger.error(f"Error fetching events from URL: {url}")
             logger.error(f"Error: {scrape_error}")
-
-    def _extract_event_details(self, card):
-        event_details = {
-            "event_source": "japan_society",
-            "event_location": "Not Available",
-            "event_time": "Not Available",
-            "event_price": "Not Available",
-            "event_url": "URL not found",
-            "event_date": "Date not found",
-            "event_name": "Title not found",
-            "event_image_url": "Image URL not found",  # New key for image URL
+            increment("fetch_errors")
+            raise
+
+    def _parse_listing(self, html_content):
+        soup = make_soup(html_content, parse_only=self.LISTING_STRAINER)
+        return {
+            "events": self._scrape_events_from_soup(soup),
+            "page_urls": self._get_pagination_urls(soup),
         }
 
-        base_url = "https://www.japansociety.org.uk/"
+    def _scrape_events_from_soup(self, soup):
+        events = []
+        event_cards = soup.find_all("div", class_="card")
+        logger.debug(f"Number of event cards: {len(event_cards)}")
+
+        for card in event_cards:
+            event_details = self._extract_event_details(card)
+            if event_details:
+                events.append(event_details)
+                debug_sampled(logger, "Event details added: %s", event_details)
+        return events
+
+    def _scrape_events_from_url(self, url):
+        return self._fetch_listing(url)["events"]
+
+    def _extract_event_details(self, card):
+        event_details = Event(
+            event_source="japan_society",
+            event_location="Not Available",
+            event_time="Not Available",
+            event_price="Not Available",
+            event_url="URL not found",
+            event_date="Date not found",
+            event_name="Title not found",
+            event_image_url="Image URL not found",  # New key for image URL
+        )
 
         # Extract event URL
         url_container = card.find("div", class_="js-news-image mb-3")
@@ -71,18 +114,6 @@ class JapanSocietyEventFetcher:
         if event_description:
             event_details["event_description"] = event_description.text.strip()
 
-        # # Extract event image["event_image_url"] = base_url + img_tag["src"]
-
-        # Fetch additional details from the event URL
-        if event_details["event_url"] != "URL not found":
-            event_page = requests.get(event_details["event_url"])
-            if event_page.status_code == 200:
-                event_soup = BeautifulSoup(event_page.content, "html.parser")
-                # Extract event image URL matching the event name
-                img_tag = event_soup.find("img", alt=event_details["event_name"])
-                if img_tag and "src" in img_tag.attrs:
-                    event_details["event_image_url"] = base_url + img_tag["src"]
-
         # Check if essential details were found
         if (
             event_details["event_name"] == "Title not found"
@@ -93,6 +124,56 @@ class JapanSocietyEventFetcher:
         else:
             return event_details
 
+    def _enrich_event_image(self, event_details):
+        """Fills in the event image from the detail page, unless already known."""
+        event_url = event_details["event_url"]
+        if event_url == "URL not found":
+            return event_details
+
+        # The cache keeps every image of a detail page parsed on a previous run,
+        # and they are matched against the current event name on each run, so
+        # a renamed event never picks up the image found under its old name
+        if self.http_cache is not None:
+            page_images = self.http_cache.peek(event_url, self._parse_event_images)
+            image_src = (page_images or {}).get(event_details["event_name"])
+            if image_src:
+                event_details["event_image_url"] = self.image_base_url + image_src
+                increment("image_hints")
+                return event_details
+
+        increment("detail_pages")
+        try:
+            page_images = fetch_and_parse(
+                self.session,
+                event_url,
+                self._parse_event_images,
+                self.http_cache,
+                decode=lambda event_page: event_page.content,
+                timeout=self.request_timeout,
+            )
+        except requests.RequestException as detail_error:
+            logger.error(f"Error fetching event page {event_url}: {detail_error}")
+            increment("fetch_errors")
+            return event_details
+
+        image_src = page_images.get(event_details["event_name"])
+        if image_src:
+            event_details["event_image_url"] = self.image_base_url + image_src
+        return event_details
+
+    def _parse_event_images(self, event_page_content):
+        """Returns the page's image sources keyed by alt text, first one winning.
+
+        The event image is the one whose alt text is the event name.
+        """
+        event_soup = make_soup(event_page_content, parse_only=self.DETAIL_STRAINER)
+        page_images = {}
+        for img_tag in event_soup.find_all("img", src=True):
+            alt_text = img_tag.get("alt")
+            if alt_text is not None:
+                page_images.setdefault(alt_text, img_tag["src"])
+        return page_images
+
     def _get_pagination_urls(self, soup):
         pagination_links = soup.find_all("a", class_="page-link")
         page_urls = [
@@ -103,25 +184,42 @@ class JapanSocietyEventFetcher:
         return page_urls
 
     def combine_and_return_events(self):
-        existing_events = []
-        self._scrape_events_from_url(self.base_url, existing_events)
+        # The first listing page supplies both its cards and the pagination links
+        initial_listing = self._fetch_listing(self.base_url)
+        existing_events = initial_listing["events"]
+        page_urls = initial_listing["page_urls"]
 
-        initial_response = self.session.get(self.base_url)
-        initial_response.raise_for_status()
-        initial_soup = BeautifulSoup(initial_response.text, "html.parser")
-        page_urls = self._get_pagination_urls(initial_soup)
-
-        unique_page_urls = sorted(set(page_urls), key=page_urls.index)
-        for page_url in unique_page_urls:
+        unique_page_urls = []
+        for page_url in sorted(set(page_urls), key=page_urls.index):
             if not page_url.startswith("http"):
                 page_url = self.base_url + page_url
-            self._scrape_events_from_url(page_url, existing_events)
+            if page_url != self.base_url and page_url not in unique_page_urls:
+                unique_page_urls.append(page_url)
+
+        for page_events in ordered_map(
+            self._scrape_events_from_url, unique_page_urls, self.max_workers
+        ):
+            existing_events.extend(page_events)
+
+        skipped_detail_fetches = sum(
+            1
+            for event in existing_events
+            if self.http_cache is not None
+            and self.http_cache.has_result(event["event_url"], self._parse_event_images)
+        )
+        logger.debug(
+            f"Skipping {skipped_detail_fetches} detail fetches with known images"
+        )
+        existing_events = ordered_map(
+            self._enrich_event_image, existing_events, self.max_workers
+        )
 
         # if existing_events == []:
         #     self.slack_manager.send_error_message(
         #         "Issue with Japan Society event fetcher, no events found"
         #     )
-        logger.info(f"Existing_events: {existing_events}")
+        logger.info("Japan Society events found: %d", len(existing_events))
+        logger.debug("Japan Society events: %s", payload(existing_events))
         return existing_events
 
 
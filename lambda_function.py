@@ -1,33 +1,120 @@
 import json
-import logging
 import os
+import time
 from datetime import datetime
 
-from fetchers.DaiwaFoundationEventFetcher import DaiwaFoundationEventFetcher
-from fetchers.JapanFoundationEventFetcher import JapanFoundationEventFetcher
-from fetchers.JapanHouseEventFetcher import JapanHouseEventFetcher
-from fetchers.JapanSocietyEventFetcher import JapanSocietyEventFetcher
-from fetchers.JETAAEventFetcher import JETAAEventFetcher
+from utils.calendar_window import DEFAULT_MONTHS_AHEAD, DEFAULT_MONTHS_BEHIND
 from utils.Comparator import Comparator
 from utils.GoogleChatManager import GoogleChatManager
+from utils.HttpCache import HttpCache
+from utils.log_utils import configure_logging, payload
+from utils.Metrics import increment, instrument_invocation, set_property, stage
+from utils.MonthCache import MonthCache
+from utils.normalisation import normalise_snapshot
+from utils.NotificationOutbox import NotificationOutbox
+from utils.RequestScheduler import HostPolicy, request_scheduler
 from utils.S3Manager import S3Manager
+from utils.SourceOrchestrator import SourceOrchestrator
 
-# Logger setup
-logger = logging.getLogger()
-logger.setLevel(logging.DEBUG)
+# Root logger; LOG_LEVEL sets the level (INFO by default)
+logger = configure_logging()
 
-# Check if there are any handlers already (to avoid duplicates)
-if not logger.hasHandlers():
-    # Console handler for terminal output
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG)
 
-    # Formatter for console output
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+def create_s3_manager():
+    """Returns the S3Manager used by the handler; the replay harness swaps it out."""
+    return S3Manager()
+
+
+# Fetchers are imported inside their builders, so a cold start only pays for
+# the parsers of the sources a run actually schedules
+def _build_jetaa(http_cache, month_cache):
+    from fetchers.JETAAEventFetcher import JETAAEventFetcher
+
+    # Calendar months from CALENDAR_MONTHS_BEHIND before the current one to
+    # CALENDAR_MONTHS_AHEAD after it
+    return JETAAEventFetcher(
+        max_workers=int(os.environ.get("JETAA_MAX_WORKERS", 4)),
+        http_cache=http_cache,
+        month_cache=month_cache,
+        months_ahead=int(os.environ.get("CALENDAR_MONTHS_AHEAD", DEFAULT_MONTHS_AHEAD)),
+        months_behind=int(
+            os.environ.get("CALENDAR_MONTHS_BEHIND", DEFAULT_MONTHS_BEHIND)
+        ),
+    ).jetaa_calendar_events_processor
+
+
+def _build_japan_house(http_cache, month_cache):
+    from fetchers.JapanHouseEventFetcher import JapanHouseEventFetcher
+
+    return JapanHouseEventFetcher(http_cache=http_cache).combine_and_return_events
+
+
+def _build_japan_society(http_cache, month_cache):
+    from fetchers.JapanSocietyEventFetcher import JapanSocietyEventFetcher
+
+    # Image lookups for detail pages parsed on earlier runs come from the HTTP cache
+    return JapanSocietyEventFetcher(
+        max_workers=int(os.environ.get("JAPAN_SOCIETY_MAX_WORKERS", 4)),
+        http_cache=http_cache,
+    ).combine_and_return_events
+
+
+def _build_japan_foundation(http_cache, month_cache):
+    from fetchers.JapanFoundationEventFetcher import JapanFoundationEventFetcher
+
+    return JapanFoundationEventFetcher(http_cache=http_cache).combine_and_return_events
+
+
+def _build_daiwa_foundation(http_cache, month_cache):
+    from fetchers.DaiwaFoundationEventFetcher import DaiwaFoundationEventFetcher
+
+    return DaiwaFoundationEventFetcher(
+        max_workers=int(os.environ.get("DAIWA_MAX_WORKERS", 4)),
+        http_cache=http_cache,
+    ).combine_and_return_events
+
+
+SOURCE_BUILDERS = {
+    "JETAA": _build_jetaa,
+    "JAPAN_HOUSE": _build_japan_house,
+    "JAPAN_SOCIETY": _build_japan_society,
+    "JAPAN_FOUNDATION": _build_japan_foundation,
+    "DAIWA_FOUNDATION": _build_daiwa_foundation,
+}
+
+# Host each source requests, for <SOURCE>_REQUEST_POLICY overrides such as
+# JETAA_REQUEST_POLICY="rate=1,concurrency=2,jitter=0.5"
+SOURCE_HOSTS = {
+    "JETAA": "www.jetaa.org.uk",
+    "JAPAN_HOUSE": "www.japanhouselondon.uk",
+    "JAPAN_SOCIETY": "www.japansociety.org.uk",
+    "JAPAN_FOUNDATION": "www.jpf.org.uk",
+    "DAIWA_FOUNDATION": "dajf.org.uk",
+}
+
+
+def configure_request_policy(source_name):
+    """Applies the source's politeness policy from the environment, if set.
+
+    Sources without one are not throttled, so they cost no wall-clock time.
+    """
+    policy_text = os.environ.get(f"{source_name}_REQUEST_POLICY")
+    if policy_text:
+        request_scheduler.configure_host(
+            SOURCE_HOSTS[source_name], HostPolicy.from_string(policy_text)
+        )
+
+
+def scheduled_sources():
+    """Returns the source names to run; EVENT_SOURCES limits them to a subset."""
+    enabled_sources = os.environ.get("EVENT_SOURCES")
+    if not enabled_sources:
+        return list(SOURCE_BUILDERS)
+    return [
+        source_name
+        for source_name in SOURCE_BUILDERS
+        if source_name in enabled_sources.split(",")
+    ]
 
 
 # Group events by source
@@ -59,53 +146,161 @@ def group_events_by_source(events):
     return grouped_events
 
 
+@instrument_invocation
 def lambda_handler(event, context):
     bucket_name = "jetaa-events"
     prefix = "as-json"
     weekly_prefix = "weekly"
-    year = 2025
-    s3_manager = S3Manager()
-    jetaa_calendar_events_processor = JETAAEventFetcher(year)
-    japan_house_scanner = JapanHouseEventFetcher()
-    japan_society_scanner = JapanSocietyEventFetcher()
-    japan_foundation = JapanFoundationEventFetcher()
-    daiwa_foundation = DaiwaFoundationEventFetcher()
-    comparator = Comparator()
-    fresh_scan_events = {}
-
-    fresh_scan_events["JETAA"] = (
-        jetaa_calendar_events_processor.jetaa_calendar_events_processor()
+    s3_manager = create_s3_manager()
+
+    # Conditional-GET cache shared by all fetchers, persisted between runs
+    http_cache = HttpCache(
+        s3_manager,
+        bucket_name=bucket_name,
+        local_path=os.environ.get(
+            "HTTP_CACHE_LOCAL_PATH", "/tmp/jetaa_http_cache.json"
+        ),
+        max_entries=int(os.environ.get("HTTP_CACHE_MAX_ENTRIES", 500)),
     )
-    fresh_scan_events["JAPAN_HOUSE"] = japan_house_scanner.combine_and_return_events()
-    fresh_scan_events["JAPAN_SOCIETY"] = (
-        japan_society_scanner.combine_and_return_events()
+    # Parsed calendar months: the current and future ones are refetched after
+    # MONTH_CACHE_TTL_HOURS, a month is frozen once it leaves the window
+    month_cache = MonthCache(
+        s3_manager,
+        bucket_name=bucket_name,
+        ttl_hours=float(os.environ.get("MONTH_CACHE_TTL_HOURS", 6)),
     )
-    fresh_scan_events["JAPAN_FOUNDATION"] = japan_foundation.combine_and_return_events()
+    with stage("cache_load"):
+        http_cache.load()
+        month_cache.load()
 
-    fresh_scan_events["DAIWA_FOUNDATION"] = daiwa_foundation.combine_and_return_events()
+    comparator = Comparator(s3_manager)
 
-    new_events = comparator.find_new_events(fresh_scan_events)
-    logger.debug(new_events)
+    # Fetch all sources concurrently, each bounded by its own deadline
+    orchestrator = SourceOrchestrator(
+        max_workers=int(os.environ.get("SOURCE_MAX_WORKERS", 5)),
+        default_timeout=float(os.environ.get("SOURCE_TIMEOUT_SECONDS", 120)),
+    )
+    for source_name in scheduled_sources():
+        configure_request_policy(source_name)
+        orchestrator.add_source(
+            source_name, SOURCE_BUILDERS[source_name](http_cache, month_cache)
+        )
 
-    grouped_new_events = group_events_by_source(new_events)
-    logger.debug(grouped_new_events)
+    # Imported here rather than at module level to keep BeautifulSoup off the
+    # cold-start path until a fetcher needs it
+    from fetchers.HtmlParser import parse_timings, reset_parse_timings
+
+    reset_parse_timings()
+    with stage("fetch"):
+        fresh_scan_events = orchestrator.run()
+
+    # Sources that failed, timed out or were not scheduled keep their last events
+    with stage("carry_forward"):
+        carried_sources = comparator.carry_forward(fresh_scan_events, SOURCE_BUILDERS)
+    for source_name in carried_sources:
+        increment("carried_forward", 1, source_name)
+        if source_name in orchestrator.report:
+            orchestrator.report[source_name]["carried_forward"] = True
+    set_property("sources", orchestrator.report)
+    set_property("html_parser", parse_timings())
+
+    # Adds ISO start/end dates and numeric prices, then drops events that ended
+    with stage("normalise"):
+        fresh_scan_events, pruned_counts = normalise_snapshot(
+            fresh_scan_events,
+            prune_past=os.environ.get("PRUNE_PAST_EVENTS", "true").lower() == "true",
+        )
+    for source_name, pruned_count in pruned_counts.items():
+        increment("events_pruned", pruned_count, source_name)
+    with stage("cache_save"):
+        http_cache.save()
+        month_cache.save()
+    set_property("month_cache", month_cache.stats())
+
+    # Changed events (same identity, edited fields) only notify when enabled
+    notify_changes = os.environ.get("NOTIFY_CHANGED_EVENTS", "false").lower() == "true"
+    with stage("compare"):
+        diff_result = comparator.diff_with_latest(
+            fresh_scan_events, resolve_details=notify_changes
+        )
+    if diff_result is None:
+        logger.error("No old events found to compare.")
+        new_events, changed_events = [], []
+    else:
+        logger.info(f"Diff against latest snapshot: {diff_result.summary()}")
+        # Removed and changed counts are only emitted when the baseline was read
+        for change_kind, count in diff_result.summary().items():
+            increment(f"events_{change_kind}", count)
+        new_events = diff_result.added
+        changed_events = (
+            [change["event"] for change in diff_result.changed]
+            if notify_changes
+            else []
+        )
+    logger.debug("New events: %s", payload(new_events))
 
-    # Initialise GoogleChatManager
-    chat_manager = GoogleChatManager()
+    grouped_new_events = group_events_by_source(new_events)
+    logger.debug("New events by source: %s", payload(grouped_new_events))
 
     # Flatten the grouped events into a single list for sending
     events_to_notify = []
     for event_list in grouped_new_events.values():
         events_to_notify.extend(event_list)
 
-    # Send events to Google Chat
-    chat_manager.notify_events(events_to_notify)
-    logger.info("Google Chat notified")
+    # Queue notifications durably before sending, so a run that stops partway
+    # resumes the pending ones instead of re-sending what was delivered
+    outbox = NotificationOutbox(s3_manager, bucket_name=bucket_name)
+    outbox_saved = False
+    with stage("queue"):
+        try:
+            outbox.load()
+        except Exception as outbox_error:
+            logger.error(f"Could not read the notification outbox: {outbox_error}")
+        else:
+            outbox.enqueue(events_to_notify)
+            if changed_events:
+                outbox.enqueue(
+                    changed_events, kind="changed", header_title="📝 Event Updated"
+                )
+            outbox_saved = outbox.save()
+
+    if outbox_saved:
+        file_name = S3Manager.build_snapshot_key(prefix, datetime.now())
 
-    file_name = f"{prefix}/events_{datetime.now().strftime('%Y-%m-%d-%H:%M:%S')}.json"
+        with stage("upload"):
+            if s3_manager.upload_snapshot_to_s3(
+                fresh_scan_events, bucket_name, file_name
+            ):
+                comparator.store_fingerprint_index(fresh_scan_events, file_name)
+                # Only advance the latest pointer once the snapshot itself is stored
+                s3_manager.update_latest_manifest(bucket_name, prefix, file_name)
+                logger.info("Uploaded to S3")
+    else:
+        # Leaving the snapshot where it was makes the next run find these events
+        # again, rather than losing notifications that were never queued
+        logger.error("Notification outbox not saved, skipping upload and notify")
 
-    s3_manager.upload_json_to_s3(fresh_scan_events, bucket_name, file_name)
-    logger.info("Uploaded to S3")
+    delivery_stats = {}
+    if outbox_saved:
+        # Initialise GoogleChatManager
+        chat_manager = GoogleChatManager()
+
+        # Send events to Google Chat, leaving a safety margin before the Lambda timeout
+        deadline = None
+        if context is not None:
+            deadline = time.monotonic() + (
+                context.get_remaining_time_in_millis() / 1000
+                - float(os.environ.get("OUTBOX_SAFETY_MARGIN_SECONDS", 30))
+            )
+        with stage("notify"):
+            delivery_stats = outbox.flush(
+                chat_manager,
+                max_events=int(os.environ.get("OUTBOX_MAX_EVENTS_PER_RUN", 100)),
+                deadline=deadline,
+            )
+        logger.info(f"Google Chat notified: {delivery_stats}")
+        for stat_name, value in delivery_stats.items():
+            increment(f"notify_{stat_name}", value)
 
     # Weekly processing
     day = os.environ.get("DAY_NUMBER", 6)
@@ -122,23 +317,24 @@ def lambda_handler(event, context):
             )
         else:
             logger.info("Weekly file not found. Running weekly scan.")
+            with stage("weekly"):
+                # Find new events for the week
+                weekly_new_events = comparator.compare_with_week_old_events(
+                    fresh_scan_events
+                )
+                weekly_grouped_events = group_events_by_source(weekly_new_events)
+                logger.debug("Weekly new events: %s", payload(weekly_new_events))
 
-            # Find new events for the week
-            weekly_new_events = comparator.compare_with_week_old_events(
-                fresh_scan_events
-            )
-            weekly_grouped_events = group_events_by_source(weekly_new_events)
-            logger.debug(f"Weekly new events: {weekly_new_events}")
-
-            # Save weekly events JSON to S3
-            s3_manager.upload_json_to_s3(
-                weekly_grouped_events, bucket_name, weekly_file_name
-            )
-            logger.info(f"Uploaded weekly events to S3: {weekly_file_name}")
+                # Save weekly events JSON to S3
+                s3_manager.upload_json_to_s3(
+                    weekly_grouped_events, bucket_name, weekly_file_name
+                )
+                logger.info(f"Uploaded weekly events to S3: {weekly_file_name}")
 
     return {
         "statusCode": 200,
         "body": json.dumps("Event processing completed successfully."),
+        "delivery_stats": delivery_stats,
     }
 
 
@@ -0,0 +1,18 @@
+from collections import namedtuple
+
+import pytest
+
+from benchmarks.parser_benchmark import BENCHMARKS, load_fixture
+
+BenchmarkCase = namedtuple(
+    "BenchmarkCase", ["source", "fixture_path", "markup", "parse"]
+)
+
+
+@pytest.fixture(
+    params=BENCHMARKS, ids=[fixture_path for _, fixture_path, _ in BENCHMARKS]
+)
+def benchmark_case(request):
+    """A recorded fixture of the parser benchmark, with a fresh parse function."""
+    source, fixture_path, make_parse = request.param
+    return BenchmarkCase(source, fixture_path, load_fixture(fixture_path), make_parse())
@@ -0,0 +1,21 @@
+from benchmarks.parser_benchmark import (
+    REPEAT_END,
+    REPEAT_START,
+    count_events,
+    load_fixture,
+)
+
+
+def test_scaled_fixture_repeats_its_events(benchmark_case):
+    parse = benchmark_case.parse
+    markup = benchmark_case.markup
+    scaled_markup = load_fixture(benchmark_case.fixture_path, scale=3)
+
+    assert REPEAT_START not in markup and REPEAT_END not in markup
+    assert REPEAT_START not in scaled_markup and REPEAT_END not in scaled_markup
+    assert len(scaled_markup) > len(markup)
+    parsed = parse(markup)
+    assert count_events(parsed) > 0
+    # Detail pages describe a single event however large the page gets
+    if not benchmark_case.fixture_path.endswith("detail.html"):
+        assert count_events(parse(scaled_markup)) > count_events(parsed)
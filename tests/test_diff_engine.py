@@ -0,0 +1,47 @@
+from utils.DiffEngine import DiffEngine
+from utils.FingerprintIndex import FingerprintIndex
+
+
+def _event(url, name="Event", date="1 May 2025"):
+    return {
+        "event_source": "jetaa",
+        "event_url": url,
+        "event_name": name,
+        "event_date": date,
+    }
+
+
+BASELINE = {"JETAA": [_event("https://example.org/a"), _event("https://example.org/b")]}
+
+
+def test_index_diff_leaves_out_unresolved_removals():
+    fresh_scan = {
+        "JETAA": [_event("https://example.org/a"), _event("https://example.org/c")]
+    }
+
+    diff_result, needs_baseline = DiffEngine.diff_against_index(
+        FingerprintIndex.from_snapshot(BASELINE), fresh_scan
+    )
+
+    assert needs_baseline
+    assert not diff_result.details_resolved
+    assert diff_result.summary() == {"added": 1}
+
+
+def test_index_diff_without_removals_or_changes_is_resolved():
+    fresh_scan = {"JETAA": BASELINE["JETAA"] + [_event("https://example.org/c")]}
+
+    diff_result, needs_baseline = DiffEngine.diff_against_index(
+        FingerprintIndex.from_snapshot(BASELINE), fresh_scan
+    )
+
+    assert not needs_baseline
+    assert diff_result.summary() == {"added": 1, "removed": 0, "changed": 0}
+
+
+def test_full_diff_counts_removed_and_changed_events():
+    fresh_scan = {"JETAA": [_event("https://example.org/a", name="Renamed")]}
+
+    diff_result = DiffEngine.diff(BASELINE, fresh_scan)
+
+    assert diff_result.summary() == {"added": 0, "removed": 1, "changed": 1}
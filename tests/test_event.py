@@ -0,0 +1,33 @@
+import pytest
+
+from utils.Event import Event
+
+
+@pytest.mark.parametrize(
+    "assign",
+    [
+        lambda event: setattr(event, "event_url", "https://example.org/b"),
+        lambda event: event.__setitem__("event_url", "https://example.org/b"),
+    ],
+    ids=["attribute", "item"],
+)
+def test_setting_an_identity_field_resets_the_cached_identity(assign):
+    event = Event(event_source="jetaa", event_url="https://example.org/a")
+    assert event.identity == ("jetaa", "https://example.org/a")
+    hash(event)
+
+    assign(event)
+
+    assert event.identity == ("jetaa", "https://example.org/b")
+    assert hash(event) == hash(
+        Event(event_source="jetaa", event_url="https://example.org/b")
+    )
+
+
+def test_setting_another_field_keeps_the_cached_identity():
+    event = Event(event_source="jetaa", event_url="https://example.org/a")
+    identity = event.identity
+
+    event.event_image_url = "https://example.org/a.jpg"
+
+    assert event.identity is identity
@@ -0,0 +1,11 @@
+from benchmarks.parser_benchmark import count_events
+from fetchers.HtmlParser import compare_extraction_plans
+
+
+def test_extraction_plan_matches_full_parse(benchmark_case):
+    comparison = compare_extraction_plans(benchmark_case.markup, benchmark_case.parse)
+
+    partial_output = comparison["results"]["partial"]["output"]
+    full_output = comparison["results"]["full"]["output"]
+    assert partial_output == full_output
+    assert count_events(partial_output) > 0
@@ -0,0 +1,77 @@
+from utils.HttpCache import HttpCache
+
+
+class _Response:
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.headers = {"ETag": '"v1"'} if status_code == 200 else {}
+
+    def raise_for_status(self):
+        pass
+
+
+class _Session:
+    """Serves the page once, then answers every revalidation with a 304."""
+
+    def __init__(self, text):
+        self.text = text
+        self.requests = []
+
+    def get(self, url, headers=None, **request_kwargs):
+        self.requests.append(dict(headers or {}))
+        if headers and headers.get("If-None-Match") == '"v1"':
+            return _Response(304)
+        return _Response(200, self.text)
+
+
+class _Fetcher:
+    PARSER_VERSION = 1
+
+    def parse(self, text):
+        return [text.upper(), self.PARSER_VERSION]
+
+
+def _parse_lower(text):
+    return text.lower()
+
+
+def _cache(tmp_path):
+    return HttpCache(local_path=str(tmp_path / "http_cache.json"))
+
+
+def test_not_modified_page_returns_stored_result(tmp_path):
+    http_cache = _cache(tmp_path)
+    session = _Session("listing")
+    fetcher = _Fetcher()
+
+    http_cache.fetch(session, "https://example.org/", fetcher.parse)
+    parsed = http_cache.fetch(session, "https://example.org/", fetcher.parse)
+
+    assert parsed == ["LISTING", 1]
+    assert session.requests[-1]["If-None-Match"] == '"v1"'
+
+
+def test_new_parser_version_reparses_unchanged_page(tmp_path):
+    http_cache = _cache(tmp_path)
+    session = _Session("listing")
+    fetcher = _Fetcher()
+    http_cache.fetch(session, "https://example.org/", fetcher.parse)
+
+    fetcher.PARSER_VERSION = 2
+    parsed = http_cache.fetch(session, "https://example.org/", fetcher.parse)
+
+    assert parsed == ["LISTING", 2]
+    assert "If-None-Match" not in session.requests[-1]
+    assert http_cache.peek("https://example.org/", fetcher.parse) == ["LISTING", 2]
+
+
+def test_peek_ignores_results_of_another_parser(tmp_path):
+    http_cache = _cache(tmp_path)
+    fetcher = _Fetcher()
+    http_cache.fetch(_Session("listing"), "https://example.org/", fetcher.parse)
+
+    assert http_cache.peek("https://example.org/", _parse_lower) is None
+    assert not http_cache.has_result("https://example.org/", _parse_lower)
+    assert http_cache.has_result("https://example.org/", fetcher.parse)
@@ -0,0 +1,140 @@
+import pytest
+
+from benchmarks.parser_benchmark import load_fixture
+from fetchers.HtmlParser import make_soup
+from fetchers.JapanFoundationEventFetcher import JapanFoundationEventFetcher
+
+EDGE_CASE_PAGE = """
+<html><body>
+  <div style="border: solid 1px #666666;">
+    <table><tr><td><font color="#FFFFFF">Before any anchor</font></td></tr></table>
+  </div>
+  <a name="top">Not an event anchor</a>
+  <a id="">Empty id</a>
+  <div style="border: solid 1px #666666;">
+    <table>
+      <tr><td><font color="#FFFFFF">Under an empty id</font></td></tr>
+      <tr><td width="100%">1 May 2025</td></tr>
+    </table>
+  </div>
+  <a id="outer"></a>
+  <div style="border: solid 1px #666666;">
+    <table>
+      <tr><td><font color="#FFFFFF">Outer block</font></td></tr>
+      <tr><td><b>Venue:</b></td><td>Outer hall</td></tr>
+    </table>
+    <a id="inner"></a>
+    <div style="border: solid 1px #666666;">
+      <table>
+        <tr><td><font color="#FFFFFF">Nested block</font></td></tr>
+        <tr><td width="100%">2 June 2025 - 3 June 2025</td></tr>
+        <tr><td><img src="../images/nested.jpg" alt=""></td></tr>
+        <tr><td><b>Venue:</b></td><td>Inner room</td></tr>
+      </table>
+    </div>
+    <img src="images/outer.jpg" alt="">
+  </div>
+  <div style="border: solid 1px #666666;">
+    <a id="inside">Anchor inside its own block</a>
+    <table><tr><td><font color="#FFFFFF">After the nested block</font></td></tr></table>
+  </div>
+  <a id="dup"></a>
+  <div style="border: solid 1px #666666;">
+    <table><tr><td><font color="#FFFFFF">First duplicate</font></td></tr></table>
+  </div>
+  <a id="dup"></a>
+  <div style="border: solid 1px #666666;">
+    <table>
+      <tr><td><font color="#FFFFFF">Second duplicate</font></td></tr>
+      <tr><td><img src="https://example.org/dup.jpg" alt=""></td></tr>
+    </table>
+  </div>
+  <div style="border: solid 1px #666666">Different style, not an event</div>
+  <a id="after-last"></a>
+</body></html>
+"""
+
+
+def _legacy_parse_events(fetcher, webpage_content):
+    """The find_previous based extractor the single-pass scan replaced."""
+    soup = make_soup(webpage_content)
+    events = []
+    for event_block in soup.find_all("div", style="border: solid 1px #666666;"):
+        title_tag = event_block.find("font", color="#FFFFFF")
+        title = title_tag.get_text(strip=True) if title_tag else "Title Not Found"
+
+        date_info_tag = event_block.find("td", width="100%")
+        date_info = (
+            fetcher._extract_date_info(date_info_tag.get_text(strip=True))
+            if date_info_tag
+            else "Date Info Not Found"
+        )
+
+        venue = "Venue Not Found"
+        for td in event_block.find_all("td"):
+            if "Venue:" in td.get_text():
+                venue = td.find_next_sibling("td").get_text(strip=True)
+                break
+
+        image_url = "Image Not Found"
+        for img_tag in event_block.find_all("img"):
+            if "alt" in img_tag.attrs and img_tag["alt"] == "":
+                if img_tag["src"].startswith("http"):
+                    image_url = img_tag["src"]
+                else:
+                    image_url = f"{fetcher.base_url}/{img_tag['src'].lstrip('../')}"
+                break
+
+        anchor_tag = event_block.find_previous("a", id=True)
+        event_id = anchor_tag["id"] if anchor_tag and "id" in anchor_tag.attrs else None
+        event_url = (
+            f"{fetcher.whatson_url}#{event_id}" if event_id else "URL Not Available"
+        )
+
+        events.append(
+            {
+                "event_source": "japan_foundation",
+                "event_name": title,
+                "event_location": venue,
+                "event_date": date_info,
+                "event_time": "Not available",
+                "event_price": "Not available",
+                "event_description": "Not available",
+                "event_image_url": image_url,
+                "event_url": event_url,
+            }
+        )
+    return events
+
+
+@pytest.mark.parametrize(
+    "webpage_content",
+    [
+        load_fixture("japan_foundation/whatson.html"),
+        load_fixture("japan_foundation/whatson.html", scale=3),
+        EDGE_CASE_PAGE,
+    ],
+    ids=["fixture", "fixture-scaled", "edge-cases"],
+)
+def test_single_pass_scan_matches_legacy_extractor(webpage_content):
+    fetcher = JapanFoundationEventFetcher()
+
+    events = [event.to_dict() for event in fetcher._parse_events(webpage_content)]
+
+    assert events == _legacy_parse_events(fetcher, webpage_content)
+
+
+def test_edge_case_page_pairs_blocks_with_preceding_anchors():
+    fetcher = JapanFoundationEventFetcher()
+
+    events = fetcher._parse_events(EDGE_CASE_PAGE)
+
+    assert [(event.event_name, event.event_url) for event in events] == [
+        ("Before any anchor", "URL Not Available"),
+        ("Under an empty id", "URL Not Available"),
+        ("Outer block", f"{fetcher.whatson_url}#outer"),
+        ("Nested block", f"{fetcher.whatson_url}#inner"),
+        ("After the nested block", f"{fetcher.whatson_url}#inner"),
+        ("First duplicate", f"{fetcher.whatson_url}#dup"),
+        ("Second duplicate", f"{fetcher.whatson_url}#dup"),
+    ]
@@ -0,0 +1,47 @@
+from datetime import date
+
+from utils.Event import Event
+from utils.MonthCache import MonthCache
+
+
+class _Fetch:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [Event(event_source="jetaa", event_name=f"Fetch {self.calls}")]
+
+
+def test_month_is_frozen_when_it_leaves_the_window():
+    month_cache = MonthCache(ttl_hours=0)
+    fetch = _Fetch()
+    month_cache.get_or_fetch("jetaa", 2025, 10, fetch, today=date(2025, 10, 18))
+
+    events = month_cache.get_or_fetch("jetaa", 2025, 10, fetch, today=date(2025, 11, 1))
+    month_cache.save(today=date(2025, 11, 1))
+
+    assert fetch.calls == 1
+    assert [event.event_name for event in events] == ["Fetch 1"]
+    assert month_cache.stats()["frozen_months"] == 1
+
+
+def test_current_month_is_refetched_after_the_ttl():
+    month_cache = MonthCache(ttl_hours=0)
+    fetch = _Fetch()
+    month_cache.get_or_fetch("jetaa", 2025, 10, fetch, today=date(2025, 10, 18))
+    month_cache.get_or_fetch("jetaa", 2025, 10, fetch, today=date(2025, 10, 18))
+    month_cache.save(today=date(2025, 10, 18))
+
+    assert fetch.calls == 2
+    assert month_cache.stats()["frozen_months"] == 0
+
+
+def test_past_month_without_an_entry_is_fetched_once():
+    month_cache = MonthCache()
+    fetch = _Fetch()
+    for _ in range(2):
+        month_cache.get_or_fetch("jetaa", 2025, 3, fetch, today=date(2025, 10, 18))
+
+    assert fetch.calls == 1
+    assert month_cache.stats()["frozen_months"] == 1
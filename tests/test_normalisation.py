@@ -0,0 +1,40 @@
+from datetime import date
+
+import pytest
+
+from utils.Event import Event
+from utils.normalisation import normalise_snapshot, parse_date_range
+
+TODAY = date(2025, 10, 18)
+
+
+@pytest.mark.parametrize(
+    "date_text, expected",
+    [
+        ("From 12 March 2025", (date(2025, 3, 12), None)),
+        ("12 March 2025 until further notice", (date(2025, 3, 12), None)),
+        ("12 April 2025 onwards", (date(2025, 4, 12), None)),
+        ("Until further notice", (None, None)),
+        ("From 12 March - 8 June 2025", (date(2025, 3, 12), date(2025, 6, 8))),
+        ("Saturday 12 March 2025 from 6pm", (date(2025, 3, 12), date(2025, 3, 12))),
+    ],
+)
+def test_parse_date_range_open_ended(date_text, expected):
+    assert parse_date_range(date_text, TODAY) == expected
+
+
+def test_open_ended_events_are_not_pruned():
+    snapshot = {
+        "JAPAN_HOUSE": [
+            Event(event_source="japan_house", event_date="From 12 March 2025"),
+            Event(event_source="japan_house", event_date="12 March 2025"),
+        ]
+    }
+
+    normalised_snapshot, pruned_counts = normalise_snapshot(snapshot, TODAY)
+
+    assert [event.event_date for event in normalised_snapshot["JAPAN_HOUSE"]] == [
+        "From 12 March 2025"
+    ]
+    assert normalised_snapshot["JAPAN_HOUSE"][0].event_end_date is None
+    assert pruned_counts == {"JAPAN_HOUSE": 1}
@@ -0,0 +1,43 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from benchmarks.LocalS3Manager import LocalS3Manager
+from utils.NotificationOutbox import NotificationOutbox
+
+
+class _DeniedS3Manager(LocalS3Manager):
+    def _get_json(self, bucket_name, file_name):
+        raise ClientError(
+            {"Error": {"Code": "AccessDenied", "Message": "Access Denied"}},
+            "GetObject",
+        )
+
+
+def test_missing_outbox_starts_empty():
+    outbox = NotificationOutbox(LocalS3Manager())
+
+    outbox.load()
+
+    assert outbox.entries == {}
+
+
+def test_unreadable_outbox_is_not_treated_as_empty():
+    s3_manager = _DeniedS3Manager()
+    outbox = NotificationOutbox(s3_manager)
+
+    with pytest.raises(ClientError):
+        outbox.load()
+    assert s3_manager.s3_resource.calls["PutObject"] == 0
+
+
+def test_saved_outbox_loads_back():
+    s3_manager = LocalS3Manager()
+    outbox = NotificationOutbox(s3_manager)
+    outbox.load()
+    outbox.enqueue([{"event_source": "jetaa", "event_name": "Bonenkai"}])
+    assert outbox.save()
+
+    reloaded_outbox = NotificationOutbox(s3_manager)
+    reloaded_outbox.load()
+
+    assert reloaded_outbox.entries == outbox.entries
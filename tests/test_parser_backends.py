@@ -0,0 +1,15 @@
+import pytest
+
+from fetchers.HtmlParser import available_backends, compare_backends
+
+
+def test_backends_extract_the_same_events(benchmark_case):
+    if len(available_backends()) < 2:
+        pytest.skip("only one HTML parser backend is installed")
+
+    comparison = compare_backends(benchmark_case.markup, benchmark_case.parse)
+
+    outputs = {
+        backend: result["output"] for backend, result in comparison["results"].items()
+    }
+    assert comparison["identical"], outputs
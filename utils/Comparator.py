@@ -1,127 +1,138 @@
 import logging
+from datetime import datetime, timedelta, timezone
 
+from utils.DiffEngine import DiffEngine
+from utils.Event import Event
+from utils.FingerprintIndex import FingerprintIndex
+from utils.log_utils import payload
 from utils.S3Manager import S3Manager
 
 logger = logging.getLogger(__name__)
 
 
 class Comparator:
-    def __init__(self):
+    def __init__(self, s3_manager=None):
         self.bucket_name = "jetaa-events"
         self.prefix = "as-json"
-        self.s3_manager = S3Manager()
+        self.s3_manager = s3_manager or S3Manager()
 
     def load_old_events(self):
         logger.debug("Loading previous state")
-        old_scan_events = self.s3_manager.get_latest_json_file_resource(
+        old_scan_events = self.s3_manager.get_latest_snapshot(
             self.bucket_name, self.prefix
         )
-        logger.debug(f"Loaded old events: {old_scan_events}")
+        logger.debug("Loaded old events: %s", payload(old_scan_events))
         return old_scan_events
 
-    def find_new_events(self, fresh_scan_events):
+    def carry_forward(self, fresh_scan_events, source_names):
+        """Fills sources missing from a fresh scan with their latest snapshot events.
+
+        A source that failed, timed out or was not scheduled keeps its previous
+        events, so the new snapshot still holds them and a later run does not
+        announce them again. The snapshot is only read when a source is missing.
+        Returns the names of the sources carried forward.
+        """
+        missing_sources = [
+            source_name
+            for source_name in source_names
+            if source_name not in fresh_scan_events
+        ]
+        if not missing_sources:
+            return []
+
         old_scan_events = self.load_old_events()
-        logger.debug(f"Old scan events: {old_scan_events}")
-        old_scan_event_source_ids = {}
-        for old_scan_source, old_scan_events in old_scan_events.items():
-            old_scan_event_set = set()
-            for old_scan_event in old_scan_events:
-                old_scan_event_id = (
-                    old_scan_event["event_source"],
-                    old_scan_event["event_name"],
-                    old_scan_event["event_location"],
-                    old_scan_event["event_date"],
-                    old_scan_event["event_time"],
-                    old_scan_event["event_price"],
-                    old_scan_event["event_url"],
-                )
-                old_scan_event_set.add(old_scan_event_id)
-            old_scan_event_source_ids[old_scan_source] = old_scan_event_set
-
-        new_events = []
-        logger.debug("Checking for new events")
+        if not isinstance(old_scan_events, dict):
+            logger.warning(f"No previous events to carry forward for {missing_sources}")
+            return []
 
+        carried_sources = []
+        for source_name in missing_sources:
+            if source_name in old_scan_events:
+                fresh_scan_events[source_name] = [
+                    Event.coerce(event) for event in old_scan_events[source_name]
+                ]
+                carried_sources.append(source_name)
+        logger.info(f"Carried forward previous events of {carried_sources}")
+        return carried_sources
+
+    def _load_fingerprint_index(self, snapshot_key):
+        index_data = self.s3_manager.get_json_object(
+            self.bucket_name, FingerprintIndex.key_for_snapshot(snapshot_key)
+        )
+        if index_data is None:
+            return None
         try:
-            for fresh_scan_source, fresh_scan_events in fresh_scan_events.items():
-                for fresh_scan_event in fresh_scan_events:
-                    fresh_scan_event_id = (
-                        fresh_scan_event["event_source"],
-                        fresh_scan_event["event_name"],
-                        fresh_scan_event["event_location"],
-                        fresh_scan_event["event_date"],
-                        fresh_scan_event["event_time"],
-                        fresh_scan_event["event_price"],
-                        fresh_scan_event["event_url"],
-                    )
-                    if (
-                        fresh_scan_source in old_scan_event_source_ids
-                        and fresh_scan_event_id
-                        not in old_scan_event_source_ids[fresh_scan_source]
-                    ):
-                        try:
-                            logger.debug(f"New event found: {fresh_scan_event}")
-                            new_events.append(fresh_scan_event)
-                        except Exception as event_error:
-                            logger.error(f"Error parsing new event: {event_error}")
-        except Exception as event_compare_error:
-            logger.error(f"Error comparing old events to new: {event_compare_error}")
-        return new_events
-
-    def load_week_old_events(self):
-        """Load events from a week ago."""
-        logger.debug("Loading week-old events")
-        week_old_events = self.s3_manager.get_json_file_from_week_ago(
+            return FingerprintIndex.from_dict(index_data)
+        except (KeyError, ValueError) as index_error:
+            logger.warning(f"Ignoring unreadable fingerprint index: {index_error}")
+            return None
+
+    def store_fingerprint_index(self, fresh_scan_events, snapshot_key):
+        """Stores the fingerprint index of a snapshot next to it."""
+        fingerprint_index = FingerprintIndex.from_snapshot(fresh_scan_events)
+        return self.s3_manager.upload_snapshot_to_s3(
+            fingerprint_index.to_dict(),
+            self.bucket_name,
+            FingerprintIndex.key_for_snapshot(snapshot_key),
+        )
+
+    def diff_with_snapshot(self, snapshot_key, fresh_scan_events, resolve_details=True):
+        """Diffs a fresh scan against the snapshot stored at ``snapshot_key``.
+
+        The snapshot's fingerprint index is read first. The snapshot body is only
+        downloaded when the index shows changed or removed events and
+        ``resolve_details`` asks for them, or when there is no index. Returns None
+        when there is no baseline to compare against.
+        """
+        if snapshot_key is None:
+            return None
+
+        fingerprint_index = self._load_fingerprint_index(snapshot_key)
+        if fingerprint_index is not None:
+            diff_result, needs_baseline = DiffEngine.diff_against_index(
+                fingerprint_index, fresh_scan_events
+            )
+            if not (needs_baseline and resolve_details):
+                logger.debug(f"Diffed against index of {snapshot_key}")
+                return diff_result
+        else:
+            # Snapshots written before the index existed
+            logger.info(
+                f"No fingerprint index for {snapshot_key}, reading the snapshot"
+            )
+
+        baseline_events = self.s3_manager.get_json_object(
+            self.bucket_name, snapshot_key
+        )
+        if not isinstance(baseline_events, dict):
+            return None
+        return DiffEngine.diff(baseline_events, fresh_scan_events)
+
+    def diff_with_latest(self, fresh_scan_events, resolve_details=True):
+        """Diffs a fresh scan against the latest snapshot."""
+        logger.debug("Loading previous state")
+        latest_key = self.s3_manager.get_latest_snapshot_key(
             self.bucket_name, self.prefix
         )
-        logger.debug(f"Loaded week-old events: {week_old_events}")
-        return week_old_events
+        return self.diff_with_snapshot(latest_key, fresh_scan_events, resolve_details)
+
+    def diff_with_week_old(self, fresh_scan_events, resolve_details=True):
+        """Diffs a fresh scan against the snapshot nearest to a week ago."""
+        logger.debug("Loading week-old state")
+        one_week_ago = datetime.now(timezone.utc) - timedelta(weeks=1)
+        week_old_key = self.s3_manager.get_snapshot_key_nearest(
+            self.bucket_name, self.prefix, one_week_ago
+        )
+        return self.diff_with_snapshot(week_old_key, fresh_scan_events, resolve_details)
 
     def compare_with_week_old_events(self, fresh_scan_events):
         """Compare fresh scan with week-old scan to find new events."""
-        old_scan_events = self.load_week_old_events()
-        weekly_new_events = []
         logger.debug("Comparing fresh scan with week-old events")
+        diff_result = self.diff_with_week_old(fresh_scan_events, resolve_details=False)
 
-        if not old_scan_events:
+        if diff_result is None:
             logger.error("No old events found to compare.")
-            return weekly_new_events
-
-        old_scan_event_source_ids = {}
-        for old_scan_source, old_scan_events in old_scan_events.items():
-            old_scan_event_set = set()
-            for old_scan_event in old_scan_events:
-                old_scan_event_id = (
-                    old_scan_event["event_source"],
-                    old_scan_event["event_name"],
-                    old_scan_event["event_location"],
-                    old_scan_event["event_date"],
-                    old_scan_event["event_time"],
-                    old_scan_event["event_price"],
-                    old_scan_event["event_url"],
-                )
-                old_scan_event_set.add(old_scan_event_id)
-            old_scan_event_source_ids[old_scan_source] = old_scan_event_set
-
-        for fresh_scan_source, fresh_scan_events in fresh_scan_events.items():
-            for fresh_scan_event in fresh_scan_events:
-                fresh_scan_event_id = (
-                    fresh_scan_event["event_source"],
-                    fresh_scan_event["event_name"],
-                    fresh_scan_event["event_location"],
-                    fresh_scan_event["event_date"],
-                    fresh_scan_event["event_time"],
-                    fresh_scan_event["event_price"],
-                    fresh_scan_event["event_url"],
-                )
-                if (
-                    fresh_scan_source in old_scan_event_source_ids
-                    and fresh_scan_event_id
-                    not in old_scan_event_source_ids[fresh_scan_source]
-                ):
-                    try:
-                        logger.debug(f"New weekly event found: {fresh_scan_event}")
-                        weekly_new_events.append(fresh_scan_event)
-                    except Exception as event_error:
-                        logger.error(f"Error parsing weekly new event: {event_error}")
-
-        return weekly_new_events
+            return []
+
+        logger.debug("New weekly events found: %s", payload(diff_result.added))
+        return diff_result.added
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+from collections import Counter
+
+from utils.Event import identity_of
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SIZE = 8
+
+# Fields compared between two versions of the same event
+CHANGE_FIELDS = (
+    "event_name",
+    "event_location",
+    "event_date",
+    "event_time",
+    "event_price",
+)
+
+
+def _digest(values):
+    joined = "\x1f".join(str(value) for value in values)
+    return hashlib.blake2b(joined.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+def event_identities(events):
+    """Returns a stable identity per event, in the same order as ``events``.
+
+    Events are keyed by source plus ``event_url``. Events without a real URL, or
+    sharing a URL with another event of the same scan, also use their date and
+    name so that each keeps a distinct identity.
+    """
+    base_identities = [identity_of(event) for event in events]
+
+    base_counts = Counter(base_identities)
+    identities = []
+    seen = Counter()
+    for event, identity in zip(events, base_identities):
+        if base_counts[identity] > 1 and len(identity) == 2:
+            identity = identity + (event.get("event_date"), event.get("event_name"))
+        seen[identity] += 1
+        if seen[identity] > 1:
+            identity = identity + (seen[identity],)
+        identities.append(identity)
+    return identities
+
+
+def identity_digest(identity):
+    return _digest(identity)
+
+
+def content_digest(event):
+    return _digest(event.get(field) for field in CHANGE_FIELDS)
+
+
+class DiffResult:
+    """Added, removed and changed events between a baseline and a fresh scan.
+
+    ``details_resolved`` is False when removed or changed events exist but were
+    not listed, because only the fingerprint index of the baseline was read.
+    """
+
+    def __init__(self, details_resolved=True):
+        self.added = []
+        self.removed = []
+        # Each entry holds the fresh event, its previous version and the
+        # changed fields as {field: {"old": ..., "new": ...}}
+        self.changed = []
+        self.details_resolved = details_resolved
+
+    def has_differences(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def summary(self):
+        """Counts per change kind; removed and changed are left out if unknown."""
+        if not self.details_resolved:
+            return {"added": len(self.added)}
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "changed": len(self.changed),
+        }
+
+
+class DiffEngine:
+    """Diffs a fresh scan against any baseline in a single pass per source.
+
+    Only sources present in both the baseline and the fresh scan are compared,
+    so a source missing from either side (e.g. a fetcher that timed out) is not
+    reported as entirely added or removed.
+    """
+
+    @staticmethod
+    def diff(baseline_events, fresh_scan_events):
+        """Diffs two snapshots shaped as {source name: [event, ...]}."""
+        result = DiffResult()
+        for source_name, fresh_events in fresh_scan_events.items():
+            if source_name not in baseline_events:
+                continue
+
+            old_events = baseline_events[source_name]
+            remaining = dict(zip(event_identities(old_events), old_events))
+            for identity, fresh_event in zip(
+                event_identities(fresh_events), fresh_events
+            ):
+                old_event = remaining.pop(identity, None)
+                if old_event is None:
+                    result.added.append(fresh_event)
+                    continue
+
+                changes = {
+                    field: {"old": old_event.get(field), "new": fresh_event.get(field)}
+                    for field in CHANGE_FIELDS
+                    if old_event.get(field) != fresh_event.get(field)
+                }
+                if changes:
+                    result.changed.append(
+                        {
+                            "event": fresh_event,
+                            "previous": old_event,
+                            "changes": changes,
+                        }
+                    )
+            result.removed.extend(remaining.values())
+        return result
+
+    @staticmethod
+    def diff_against_index(fingerprint_index, fresh_scan_events):
+        """Diffs a fresh scan against a fingerprint index without the baseline body.
+
+        Returns a DiffResult with the added events, plus a flag telling whether
+        any event changed or disappeared. Those need the baseline events for
+        field-level detail, so callers diff against the full snapshot when it is
+        set; until then the result is marked as not having its details resolved.
+        """
+        result = DiffResult()
+        needs_baseline = False
+        for source_name, fresh_events in fresh_scan_events.items():
+            if not fingerprint_index.has_source(source_name):
+                continue
+
+            matched = 0
+            for identity, fresh_event in zip(
+                event_identities(fresh_events), fresh_events
+            ):
+                previous_content = fingerprint_index.lookup(
+                    source_name, identity_digest(identity)
+                )
+                if previous_content is None:
+                    result.added.append(fresh_event)
+                    continue
+                matched += 1
+                if previous_content != content_digest(fresh_event):
+                    needs_baseline = True
+            if matched != fingerprint_index.count(source_name):
+                needs_baseline = True
+        result.details_resolved = not needs_baseline
+        return result, needs_baseline
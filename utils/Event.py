@@ -0,0 +1,168 @@
+EVENT_FIELDS = (
+    "event_source",
+    "event_name",
+    "event_location",
+    "event_date",
+    "event_time",
+    "event_price",
+    "event_url",
+    "event_image_url",
+    "event_description",
+    # Normalised from the raw text above; see utils.normalisation
+    "event_start_date",
+    "event_end_date",
+    "event_price_amount",
+)
+# Changing any of these changes which listing the event is matched against
+IDENTITY_FIELDS = ("event_source", "event_url", "event_date", "event_name")
+
+
+def _base_identity(event_source, event_url, event_date, event_name):
+    event_url = event_url or ""
+    if event_url.startswith("http"):
+        return (event_source, event_url)
+    return (event_source, event_url, event_date, event_name)
+
+
+def identity_of(event):
+    """Returns the base identity of an Event or of a snapshot dict.
+
+    Events are keyed by source plus ``event_url``; events without a real URL
+    also use their date and name.
+    """
+    if isinstance(event, Event):
+        return event.identity
+    return _base_identity(
+        event.get("event_source"),
+        event.get("event_url"),
+        event.get("event_date"),
+        event.get("event_name"),
+    )
+
+
+class Event:
+    """One event listing with the canonical field set shared by all fetchers.
+
+    Fields a source does not provide are None and left out of ``to_dict``. The
+    identity is computed once and cached; item access (``event["event_url"]``,
+    ``event.get(...)``) works as on the snapshot dicts, so code handling both
+    stays the same. Setting an identity field, by attribute or by item, resets
+    the cached identity.
+    """
+
+    __slots__ = EVENT_FIELDS + ("_identity", "_identity_hash")
+
+    def __init__(
+        self,
+        event_source=None,
+        event_name=None,
+        event_location=None,
+        event_date=None,
+        event_time=None,
+        event_price=None,
+        event_url=None,
+        event_image_url=None,
+        event_description=None,
+        event_start_date=None,
+        event_end_date=None,
+        event_price_amount=None,
+    ):
+        self.event_source = event_source
+        self.event_name = event_name
+        self.event_location = event_location
+        self.event_date = event_date
+        self.event_time = event_time
+        self.event_price = event_price
+        self.event_url = event_url
+        self.event_image_url = event_image_url
+        self.event_description = event_description
+        self.event_start_date = event_start_date
+        self.event_end_date = event_end_date
+        self.event_price_amount = event_price_amount
+        self._identity = None
+        self._identity_hash = None
+
+    @classmethod
+    def from_dict(cls, event_data):
+        """Builds an Event from a snapshot dict; unknown keys are dropped."""
+        return cls(*[event_data.get(field) for field in EVENT_FIELDS])
+
+    @classmethod
+    def coerce(cls, event):
+        """Returns ``event`` as an Event, converting snapshot dicts."""
+        if isinstance(event, cls):
+            return event
+        return cls.from_dict(event)
+
+    def to_dict(self):
+        """Returns the snapshot JSON form, without the fields that are unset."""
+        event_data = {}
+        for field in EVENT_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                event_data[field] = value
+        return event_data
+
+    @property
+    def identity(self):
+        if self._identity is None:
+            self._identity = _base_identity(
+                self.event_source, self.event_url, self.event_date, self.event_name
+            )
+        return self._identity
+
+    def get(self, field, default=None):
+        value = getattr(self, field, None) if field in EVENT_FIELDS else None
+        return default if value is None else value
+
+    def __getitem__(self, field):
+        if field not in EVENT_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field not in EVENT_FIELDS:
+            raise KeyError(field)
+        setattr(self, field, value)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in IDENTITY_FIELDS:
+            object.__setattr__(self, "_identity", None)
+            object.__setattr__(self, "_identity_hash", None)
+
+    def _values(self):
+        return tuple(getattr(self, field) for field in EVENT_FIELDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, Event):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self):
+        if self._identity_hash is None:
+            self._identity_hash = hash(self.identity)
+        return self._identity_hash
+
+    def __copy__(self):
+        event_copy = Event(*self._values())
+        event_copy._identity = self._identity
+        event_copy._identity_hash = self._identity_hash
+        return event_copy
+
+    def __deepcopy__(self, memo):
+        # Every field holds an immutable value, so a shallow copy is enough
+        return self.__copy__()
+
+    def __reduce__(self):
+        return (Event, self._values())
+
+    def __repr__(self):
+        return f"Event({self.to_dict()!r})"
+
+
+def json_default(value):
+    """``default`` hook for json.dumps, writing Events in snapshot form."""
+    if isinstance(value, Event):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,92 @@
+import base64
+import logging
+
+from utils.DiffEngine import (
+    DIGEST_SIZE,
+    content_digest,
+    event_identities,
+    identity_digest,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+ENTRY_SIZE = 2 * DIGEST_SIZE
+
+
+class FingerprintIndex:
+    """Per-source sorted arrays of event fingerprints, stored next to a snapshot.
+
+    Each entry packs the digest of an event's identity followed by the digest of
+    its compared fields. Lookups are a binary search over the packed entries, so
+    checking a fresh scan costs O(m log n) without reading the old snapshot.
+    """
+
+    def __init__(self, sources=None):
+        # Source name to the concatenation of its entries, sorted by identity
+        self.sources = sources or {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        sources = {}
+        for source_name, events in snapshot.items():
+            entries = sorted(
+                {
+                    identity_digest(identity) + content_digest(event)
+                    for identity, event in zip(event_identities(events), events)
+                }
+            )
+            sources[source_name] = b"".join(entries)
+        return cls(sources)
+
+    @classmethod
+    def from_dict(cls, index_data):
+        if index_data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {index_data.get('version')}")
+        return cls(
+            {
+                source_name: base64.b64decode(packed_entries)
+                for source_name, packed_entries in index_data["sources"].items()
+            }
+        )
+
+    def to_dict(self):
+        return {
+            "version": INDEX_VERSION,
+            "digest_size": DIGEST_SIZE,
+            "sources": {
+                source_name: base64.b64encode(packed_entries).decode("ascii")
+                for source_name, packed_entries in self.sources.items()
+            },
+        }
+
+    @staticmethod
+    def key_for_snapshot(snapshot_key):
+        """Returns the key of the index stored alongside ``snapshot_key``."""
+        for suffix in (".json.gz", ".json"):
+            if snapshot_key.endswith(suffix):
+                snapshot_key = snapshot_key[: -len(suffix)]
+                break
+        return f"{snapshot_key}.fingerprints.gz"
+
+    def has_source(self, source_name):
+        return source_name in self.sources
+
+    def count(self, source_name):
+        return len(self.sources.get(source_name, b"")) // ENTRY_SIZE
+
+    def lookup(self, source_name, identity):
+        """Returns the content digest stored for an identity digest, or None."""
+        packed_entries = self.sources.get(source_name, b"")
+        low, high = 0, len(packed_entries) // ENTRY_SIZE
+        while low < high:
+            middle = (low + high) // 2
+            offset = middle * ENTRY_SIZE
+            entry_identity = packed_entries[offset : offset + DIGEST_SIZE]
+            if entry_identity == identity:
+                return packed_entries[offset + DIGEST_SIZE : offset + ENTRY_SIZE]
+            if entry_identity < identity:
+                low = middle + 1
+            else:
+                high = middle
+        return None
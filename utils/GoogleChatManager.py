@@ -1,14 +1,43 @@
+import json
 import logging
 import os
-import requests
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from urllib.parse import quote
 
+import requests
+
+from utils.Event import Event
+from utils.http_session import get_session
+from utils.TokenBucket import TokenBucket
+
 logger = logging.getLogger(__name__)
 
 
 class GoogleChatManager:
-    def __init__(self):
+    def __init__(
+        self,
+        max_cards_per_message=10,
+        max_payload_bytes=30000,
+        messages_per_second=1.0,
+        max_retries=5,
+        backoff_base_seconds=1.0,
+        backoff_max_seconds=30.0,
+        request_timeout=10,
+    ):
         self.webhook_url = os.environ["GOOGLE_CHAT_WEBHOOK_URL"]
+        # Google Chat caps message size at 32,000 bytes; leave headroom
+        self.max_cards_per_message = max_cards_per_message
+        self.max_payload_bytes = max_payload_bytes
+        # Webhook writes are limited per space, so pace messages to the quota
+        self.rate_limiter = TokenBucket(messages_per_second, capacity=1)
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.request_timeout = request_timeout
+        self.session = get_session("google_chat", pool_maxsize=1)
 
     def _price_formatter(self, event_price):
         event_price_str = str(event_price)
@@ -98,8 +127,9 @@ class GoogleChatManager:
 
         return source, logo_url
 
-    def send_event_message(
+    def _build_card(
         self,
+        card_id,
         event_source,
         event_name,
         event_location,
@@ -108,94 +138,265 @@ class GoogleChatManager:
         event_price,
         event_url,
         event_image_url,
+        header_title="✨ New Event Found!",
     ):
-
         _, logo_url = self._fetch_event_source_metadata(event_source)
+        not_available = "Not available"
 
-        message_card = {
-            "cardsV2": [
-                {
-                    "cardId": event_name,
-                    "card": {
-                        "header": {
-                            "title": f"✨ New Event Found!",
-                            "subtitle": event_name,
-                            "imageUrl": logo_url,
-                            "imageType": "SQUARE",
-                        },
-                        "sections": [
+        return {
+            "cardId": card_id,
+            "card": {
+                "header": {
+                    "title": header_title,
+                    "subtitle": event_name,
+                    "imageUrl": logo_url,
+                    "imageType": "SQUARE",
+                },
+                "sections": [
+                    {
+                        "widgets": [
                             {
-                                "widgets": [
-                                    {
-                                        "image": {
-                                            "imageUrl": event_image_url,
-                                            "altText": "Event Image",
-                                        }
-                                    },
-                                    {
-                                        "decoratedText": {
-                                            "startIcon": {"knownIcon": "INVITE"},
-                                            "text": event_date,
-                                        }
-                                    },
-                                    {
-                                        "decoratedText": {
-                                            "startIcon": {"knownIcon": "CLOCK"},
-                                            "text": event_time,
-                                        }
-                                    },
-                                    {
-                                        "decoratedText": {
-                                            "startIcon": {"knownIcon": "MAP_PIN"},
-                                            "text": event_location,
-                                        }
-                                    },
-                                    {
-                                        "decoratedText": {
-                                            "startIcon": {"knownIcon": "DOLLAR"},
-                                            "text": event_price,
-                                        }
-                                    },
-                                    {
-                                        "buttonList": {
-                                            "buttons": [
-                                                {
-                                                    "text": "🌐 View Event",
-                                                    "onClick": {
-                                                        "openLink": {"url": event_url}
-                                                    },
-                                                }
-                                            ]
+                                "image": {
+                                    "imageUrl": event_image_url or logo_url,
+                                    "altText": "Event Image",
+                                }
+                            },
+                            {
+                                "decoratedText": {
+                                    "startIcon": {"knownIcon": "INVITE"},
+                                    "text": event_date or not_available,
+                                }
+                            },
+                            {
+                                "decoratedText": {
+                                    "startIcon": {"knownIcon": "CLOCK"},
+                                    "text": event_time or not_available,
+                                }
+                            },
+                            {
+                                "decoratedText": {
+                                    "startIcon": {"knownIcon": "MAP_PIN"},
+                                    "text": event_location or not_available,
+                                }
+                            },
+                            {
+                                "decoratedText": {
+                                    "startIcon": {"knownIcon": "DOLLAR"},
+                                    "text": event_price or not_available,
+                                }
+                            },
+                            {
+                                "buttonList": {
+                                    "buttons": [
+                                        {
+                                            "text": "🌐 View Event",
+                                            "onClick": {"openLink": {"url": event_url}},
                                         }
-                                    },
-                                ]
-                            }
-                        ],
-                    },
-                }
+                                    ]
+                                }
+                            },
+                        ]
+                    }
+                ],
+            },
+        }
+
+    def send_event_message(
+        self,
+        event_source,
+        event_name,
+        event_location,
+        event_date,
+        event_time,
+        event_price,
+        event_url,
+        event_image_url,
+        header_title="✨ New Event Found!",
+    ):
+        message_card = {
+            "cardsV2": [
+                self._build_card(
+                    event_name,
+                    event_source,
+                    event_name,
+                    event_location,
+                    event_date,
+                    event_time,
+                    event_price,
+                    event_url,
+                    event_image_url,
+                    header_title,
+                )
             ]
         }
+        return self._post_message(message_card, self._new_delivery_stats())
 
+    @staticmethod
+    def _new_delivery_stats():
+        return {
+            "events_total": 0,
+            "events_delivered": 0,
+            "events_failed": 0,
+            "messages_sent": 0,
+            "messages_failed": 0,
+            "events_deferred": 0,
+            "retries": 0,
+            "rate_limited": 0,
+        }
+
+    @staticmethod
+    def _retry_after_seconds(response):
+        retry_after = response.headers.get("Retry-After")
+        if not retry_after:
+            return None
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
         try:
-            response = requests.post(
-                self.webhook_url,
-                json=message_card,
-                headers={"Content-Type": "application/json"},
+            retry_at = parsedate_to_datetime(retry_after)
+            return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def _post_message(self, message, delivery_stats, deadline=None):
+        """Posts one webhook message, retrying 429s and server errors with backoff.
+
+        Returns True once the message is accepted and False when it failed.
+        Waits, including a server's Retry-After, are capped at
+        backoff_max_seconds. If the next wait would cross the monotonic
+        ``deadline``, None is returned instead, without failing the message.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            retry_after = None
+            try:
+                response = self.session.post(
+                    self.webhook_url,
+                    json=message,
+                    headers={"Content-Type": "application/json"},
+                    timeout=self.request_timeout,
+                )
+            except requests.RequestException as e:
+                logger.warning(f"Error sending message to Google Chat: {e}")
+            else:
+                if response.status_code == 429:
+                    delivery_stats["rate_limited"] += 1
+                    self.rate_limiter.drain()
+                    retry_after = self._retry_after_seconds(response)
+                elif response.status_code >= 500:
+                    retry_after = self._retry_after_seconds(response)
+                else:
+                    try:
+                        response.raise_for_status()
+                    except requests.RequestException as e:
+                        # Other client errors will not succeed on retry
+                        logger.error(f"Failed to send message to Google Chat: {e}")
+                        delivery_stats["messages_failed"] += 1
+                        return False
+                    delivery_stats["messages_sent"] += 1
+                    logger.debug("Message sent successfully to Google Chat")
+                    return True
+                logger.warning(
+                    f"Google Chat responded with {response.status_code}, retrying"
+                )
+
+            if attempt == self.max_retries:
+                break
+            if retry_after is None:
+                backoff = min(
+                    self.backoff_base_seconds * 2**attempt, self.backoff_max_seconds
+                )
+                retry_after = backoff / 2 + random.uniform(0, backoff / 2)
+            retry_after = min(retry_after, self.backoff_max_seconds)
+            if deadline is not None and time.monotonic() + retry_after >= deadline:
+                logger.warning("Not retrying Google Chat message past the deadline")
+                return None
+            delivery_stats["retries"] += 1
+            time.sleep(retry_after)
+
+        logger.error(
+            f"Failed to send message to Google Chat after {self.max_retries + 1} attempts"
+        )
+        delivery_stats["messages_failed"] += 1
+        return False
+
+    def _pack_messages(self, cards):
+        """Groups cards into as few messages as the card and payload limits allow."""
+        messages = []
+        current_cards = []
+        empty_size = len(json.dumps({"cardsV2": []}))
+        current_size = empty_size
+        for card in cards:
+            card_size = len(json.dumps(card).encode("utf-8")) + 2
+            if current_cards and (
+                len(current_cards) >= self.max_cards_per_message
+                or current_size + card_size > self.max_payload_bytes
+            ):
+                messages.append(current_cards)
+                current_cards = []
+                current_size = empty_size
+            current_cards.append(card)
+            current_size += card_size
+        if current_cards:
+            messages.append(current_cards)
+        return messages
+
+    def notify_events(
+        self,
+        events,
+        header_title="✨ New Event Found!",
+        on_delivered=None,
+        on_failed=None,
+        deadline=None,
+    ):
+        """Sends events as packed card messages and returns delivery stats.
+
+        ``on_delivered`` is called with the events of each message as soon as that
+        message is accepted, and ``on_failed`` with those of each message that
+        failed, so callers can record progress incrementally. Once a retry would
+        cross the monotonic ``deadline``, sending stops and the remaining events
+        are counted as deferred, without calling either callback.
+        """
+        delivery_stats = self._new_delivery_stats()
+        delivery_stats["events_total"] = len(events)
+        # Queued events come back from the outbox as dicts, possibly missing keys
+        cards = [
+            self._build_card(
+                f"event-{card_number}",
+                event.event_source,
+                event.event_name,
+                event.event_location,
+                event.event_date,
+                event.event_time,
+                event.event_price,
+                event.event_url,
+                event.event_image_url,
+                header_title,
             )
-            response.raise_for_status()
-            logger.debug("Message sent successfully to Google Chat")
-        except requests.RequestException as e:
-            logger.error(f"Failed to send message to Google Chat: {e}")
-
-    def notify_events(self, events):
-        for event in events:
-            self.send_event_message(
-                event["event_source"],
-                event["event_name"],
-                event["event_location"],
-                event["event_date"],
-                event["event_time"],
-                event["event_price"],
-                event["event_url"],
-                event["event_image_url"],
+            for card_number, event in enumerate(map(Event.coerce, events))
+        ]
+
+        sent_count = 0
+        for message_cards in self._pack_messages(cards):
+            message_events = events[sent_count : sent_count + len(message_cards)]
+            sent_count += len(message_cards)
+            delivered = self._post_message(
+                {"cardsV2": message_cards}, delivery_stats, deadline
             )
+            if delivered is None:
+                delivery_stats["events_deferred"] += len(events) - (
+                    sent_count - len(message_cards)
+                )
+                break
+            if delivered:
+                delivery_stats["events_delivered"] += len(message_cards)
+                if on_delivered:
+                    on_delivered(message_events)
+            else:
+                delivery_stats["events_failed"] += len(message_cards)
+                if on_failed:
+                    on_failed(message_events)
+
+        logger.info(f"Google Chat delivery: {delivery_stats}")
+        return delivery_stats
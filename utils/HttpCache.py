@@ -0,0 +1,226 @@
+import copy
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from utils.Event import json_default
+from utils.Metrics import increment, measure, record_response
+
+logger = logging.getLogger(__name__)
+
+# Bumped only when the entry format changes; parser changes are caught by
+# parser_identity
+CACHE_VERSION = 2
+
+
+def parser_identity(parse):
+    """Returns the name and version of the parser that produced a cached result.
+
+    The version is the PARSER_VERSION of the fetcher a bound parse method
+    belongs to, so bumping it, or switching to another parse method, turns the
+    stored results of that fetcher into misses.
+    """
+    while isinstance(parse, functools.partial):
+        parse = parse.func
+    owner = getattr(parse, "__self__", None)
+    parser_version = getattr(owner, "PARSER_VERSION", 0)
+    return f"{parse.__module__}.{parse.__qualname__}:{parser_version}"
+
+
+def fetch_and_parse(
+    session, url, parse, http_cache=None, decode=None, **request_kwargs
+):
+    """Fetches ``url`` and returns ``parse(text)``, through ``http_cache`` when given.
+
+    Raises ``requests.HTTPError`` for unsuccessful responses, like ``raise_for_status``.
+    """
+    if http_cache is not None:
+        return http_cache.fetch(session, url, parse, decode=decode, **request_kwargs)
+
+    response = session.get(url, **request_kwargs)
+    record_response(response)
+    response.raise_for_status()
+    with measure("parse_seconds"):
+        return parse(decode(response) if decode else response.text)
+
+
+class HttpCache:
+    """Conditional-GET cache of parsed page results, shared by all fetchers.
+
+    Each entry keeps the ETag, Last-Modified and body hash of a URL together with
+    the result its fetcher parsed from it. A 304 response, or a 200 whose body hash
+    is unchanged, returns the stored result without parsing the page again. An
+    entry stored by another parser, or another version of it, is a miss.
+    """
+
+    def __init__(
+        self,
+        s3_manager=None,
+        bucket_name="jetaa-events",
+        s3_key="cache/http_cache.json.gz",
+        local_path="/tmp/jetaa_http_cache.json",
+        max_entries=500,
+        max_age_days=14,
+    ):
+        self.s3_manager = s3_manager
+        self.bucket_name = bucket_name
+        self.s3_key = s3_key
+        self.local_path = local_path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Loads entries from /tmp if a warm container left them, otherwise from S3."""
+        cache_data = None
+        if os.path.exists(self.local_path):
+            try:
+                with open(self.local_path, "r", encoding="utf-8") as cache_file:
+                    cache_data = json.load(cache_file)
+                logger.debug(f"Loaded HTTP cache from {self.local_path}")
+            except (OSError, ValueError) as local_load_error:
+                logger.warning(f"Ignoring unreadable HTTP cache: {local_load_error}")
+
+        if cache_data is None and self.s3_manager is not None:
+            cache_data = self.s3_manager.get_json_object(self.bucket_name, self.s3_key)
+            if cache_data is not None:
+                logger.debug(
+                    f"Loaded HTTP cache from s3://{self.bucket_name}/{self.s3_key}"
+                )
+
+        if not cache_data or cache_data.get("version") != CACHE_VERSION:
+            self.entries = {}
+        else:
+            self.entries = cache_data.get("entries", {})
+        logger.info(f"HTTP cache loaded with {len(self.entries)} entries")
+
+    def save(self):
+        """Evicts stale entries, then persists the cache to /tmp and S3."""
+        with self.lock:
+            self._evict()
+            cache_data = {"version": CACHE_VERSION, "entries": self.entries}
+            serialised = json.dumps(
+                cache_data, separators=(",", ":"), default=json_default
+            )
+
+        try:
+            with open(self.local_path, "w", encoding="utf-8") as cache_file:
+                cache_file.write(serialised)
+        except OSError as local_save_error:
+            logger.warning(f"Could not write HTTP cache locally: {local_save_error}")
+
+        if self.s3_manager is not None:
+            self.s3_manager.upload_snapshot_to_s3(
+                cache_data, self.bucket_name, self.s3_key
+            )
+        logger.info(f"HTTP cache saved: {self.stats()}")
+
+    def _evict(self):
+        """Drops entries unused for max_age_days, then the least recently used."""
+        cutoff = time.time() - self.max_age_seconds
+        expired = [
+            url for url, entry in self.entries.items() if entry["last_used"] < cutoff
+        ]
+        for url in expired:
+            del self.entries[url]
+
+        overflow = len(self.entries) - self.max_entries
+        if overflow > 0:
+            least_recent = sorted(
+                self.entries, key=lambda url: self.entries[url]["last_used"]
+            )
+            for url in least_recent[:overflow]:
+                del self.entries[url]
+        self.evictions += len(expired) + max(overflow, 0)
+
+    def _entry_for(self, url, parse):
+        entry = self.entries.get(url)
+        if entry and entry.get("parser") != parser_identity(parse):
+            return None
+        return entry
+
+    def has_result(self, url, parse):
+        """True when ``url`` has a result stored by ``parse``."""
+        with self.lock:
+            return self._entry_for(url, parse) is not None
+
+    def peek(self, url, parse):
+        """Returns the result ``parse`` stored for ``url``, or None, without a request.
+
+        A peek does not count as a use of the entry, so it still ages out after
+        max_age_days and the page is then fetched and revalidated again.
+        """
+        with self.lock:
+            entry = self._entry_for(url, parse)
+            if entry is None:
+                return None
+            self.hits += 1
+            parsed = copy.deepcopy(entry["parsed"])
+        increment("http_cache_hits")
+        return parsed
+
+    def fetch(self, session, url, parse, decode=None, **request_kwargs):
+        with self.lock:
+            entry = self._entry_for(url, parse)
+
+        headers = dict(request_kwargs.pop("headers", None) or {})
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = session.get(url, headers=headers, **request_kwargs)
+        record_response(response)
+
+        if response.status_code == 304 and entry:
+            logger.debug(f"HTTP cache hit (304) for {url}")
+            return self._hit(url, entry)
+        response.raise_for_status()
+
+        body_hash = hashlib.sha256(response.content).hexdigest()
+        if entry and entry["body_hash"] == body_hash:
+            logger.debug(f"HTTP cache hit (unchanged body) for {url}")
+            return self._hit(url, entry, response)
+
+        with measure("parse_seconds"):
+            parsed = parse(decode(response) if decode else response.text)
+        with self.lock:
+            self.misses += 1
+            self.entries[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "body_hash": body_hash,
+                "parsed": copy.deepcopy(parsed),
+                "parser": parser_identity(parse),
+                "last_used": time.time(),
+            }
+        return parsed
+
+    def _hit(self, url, entry, response=None):
+        increment("http_cache_hits")
+        with self.lock:
+            self.hits += 1
+            entry["last_used"] = time.time()
+            if response is not None:
+                entry["etag"] = response.headers.get("ETag") or entry.get("etag")
+                entry["last_modified"] = response.headers.get(
+                    "Last-Modified"
+                ) or entry.get("last_modified")
+            return copy.deepcopy(entry["parsed"])
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
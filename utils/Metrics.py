@@ -0,0 +1,223 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import ContextDecorator, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "JETAAEventNotifier")
+SERVICE_NAME = "jetaa-events"
+# CloudWatch accepts at most 100 metrics per metric directive
+MAX_METRICS_PER_DIRECTIVE = 100
+
+_current_recorder = ContextVar("metrics_recorder", default=None)
+_current_source = ContextVar("metrics_source", default=None)
+
+
+def _unit_for(metric_name):
+    if metric_name.endswith("_seconds"):
+        return "Seconds"
+    if metric_name.endswith("_bytes"):
+        return "Bytes"
+    return "Count"
+
+
+class MetricsRecorder:
+    """Collects stage timings and per-source counters for one invocation.
+
+    ``to_emf`` renders everything as a single CloudWatch Embedded Metric Format
+    record, so one log line per invocation becomes queryable metrics.
+    """
+
+    def __init__(self, namespace=NAMESPACE, service_name=SERVICE_NAME):
+        self.namespace = namespace
+        self.service_name = service_name
+        # Stage name to {"duration_seconds": ..., "errors": ...}
+        self.stages = {}
+        # Source name to {counter name: value}
+        self.sources = {}
+        self.counters = {}
+        self.properties = {}
+        self.lock = threading.Lock()
+
+    def add(self, metric_name, value=1, source_name=None):
+        with self.lock:
+            counters = (
+                self.sources.setdefault(source_name, {})
+                if source_name
+                else self.counters
+            )
+            counters[metric_name] = counters.get(metric_name, 0) + value
+
+    def record_stage(self, stage_name, duration_seconds, failed=False):
+        with self.lock:
+            stage = self.stages.setdefault(
+                stage_name, {"duration_seconds": 0.0, "errors": 0}
+            )
+            stage["duration_seconds"] += duration_seconds
+            stage["errors"] += int(failed)
+
+    def set_property(self, name, value):
+        """Attaches a non-metric value to the record, e.g. a per-source report."""
+        with self.lock:
+            self.properties[name] = value
+
+    def _metric_values(self):
+        metric_values = {}
+        for stage_name, stage in self.stages.items():
+            for metric_name, value in stage.items():
+                metric_values[f"stage.{stage_name}.{metric_name}"] = value
+        for source_name, counters in self.sources.items():
+            for metric_name, value in counters.items():
+                metric_values[f"source.{source_name}.{metric_name}"] = value
+        metric_values.update(self.counters)
+        return metric_values
+
+    def to_emf(self):
+        with self.lock:
+            metric_values = self._metric_values()
+            metric_names = sorted(metric_values)
+            record = {
+                "_aws": {
+                    "Timestamp": int(time.time() * 1000),
+                    "CloudWatchMetrics": [
+                        {
+                            "Namespace": self.namespace,
+                            "Dimensions": [["Service"]],
+                            "Metrics": [
+                                {"Name": metric_name, "Unit": _unit_for(metric_name)}
+                                for metric_name in metric_names[
+                                    start : start + MAX_METRICS_PER_DIRECTIVE
+                                ]
+                            ],
+                        }
+                        for start in range(
+                            0, len(metric_names), MAX_METRICS_PER_DIRECTIVE
+                        )
+                    ],
+                },
+                "Service": self.service_name,
+                **self.properties,
+            }
+        for metric_name, value in metric_values.items():
+            record[metric_name] = round(value, 6) if isinstance(value, float) else value
+        return record
+
+    def emit(self, stream=None):
+        """Writes the record as one JSON line, the form CloudWatch Logs ingests."""
+        stream = stream or sys.stdout
+        stream.write(json.dumps(self.to_emf(), default=str) + "\n")
+        stream.flush()
+
+
+def current_recorder():
+    return _current_recorder.get()
+
+
+def instrument_invocation(handler):
+    """Decorates a Lambda handler to collect and emit one metrics record per call."""
+
+    @wraps(handler)
+    def instrumented_handler(*args, **kwargs):
+        recorder = MetricsRecorder()
+        token = _current_recorder.set(recorder)
+        started = time.perf_counter()
+        failed = False
+        try:
+            return handler(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            recorder.record_stage("invocation", time.perf_counter() - started, failed)
+            _current_recorder.reset(token)
+            try:
+                recorder.emit()
+            except Exception as emit_error:
+                logger.error(f"Failed to emit metrics: {emit_error}")
+
+    return instrumented_handler
+
+
+class stage(ContextDecorator):
+    """Times a pipeline stage; usable as a context manager or a decorator.
+
+    An exception escaping the stage is counted as a stage error and re-raised.
+    """
+
+    def __init__(self, stage_name):
+        self.stage_name = stage_name
+        self._started = threading.local()
+
+    def __enter__(self):
+        self._started.value = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        recorder = current_recorder()
+        if recorder is not None:
+            recorder.record_stage(
+                self.stage_name,
+                time.perf_counter() - self._started.value,
+                failed=exc_type is not None,
+            )
+        return False
+
+
+class measure(ContextDecorator):
+    """Adds the time spent in a block to a counter of the current source."""
+
+    def __init__(self, metric_name):
+        self.metric_name = metric_name
+        self._started = threading.local()
+
+    def __enter__(self):
+        self._started.value = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        increment(self.metric_name, time.perf_counter() - self._started.value)
+        return False
+
+
+@contextmanager
+def source_scope(source_name):
+    """Attributes counters recorded inside the block to ``source_name``."""
+    token = _current_source.set(source_name)
+    try:
+        yield
+    finally:
+        _current_source.reset(token)
+
+
+def increment(metric_name, value=1, source_name=None):
+    """Adds ``value`` to a counter of the current (or given) source.
+
+    Does nothing outside an instrumented invocation, so fetchers can count
+    freely when run on their own.
+    """
+    recorder = current_recorder()
+    if recorder is not None:
+        recorder.add(metric_name, value, source_name or _current_source.get())
+
+
+def set_property(name, value):
+    """Attaches a non-metric value to the current invocation's record."""
+    recorder = current_recorder()
+    if recorder is not None:
+        recorder.set_property(name, value)
+
+
+def record_response(response):
+    """Counts an HTTP request and the bytes it downloaded for the current source."""
+    increment("http_requests")
+    increment("downloaded_bytes", len(response.content or b""))
+    if response.status_code == 304:
+        increment("http_not_modified")
+    elif response.status_code >= 400:
+        increment("http_errors")
@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+from datetime import date
+
+from utils.Event import EVENT_FIELDS, Event
+from utils.Metrics import increment
+
+logger = logging.getLogger(__name__)
+
+MONTH_CACHE_VERSION = 1
+
+
+def _month_key(source_name, year, month):
+    return f"{source_name}/{year:04d}-{month:02d}"
+
+
+class MonthCache:
+    """Per-month cache of parsed events for calendar-style sources.
+
+    A month's page stops changing once the month is over. When a month leaves the
+    window its last fetched entry is frozen and served from then on without any
+    request; a past month with no entry is fetched once and frozen. The current
+    and future months are refetched once their entry is older than
+    ``ttl_hours``.
+
+    Events are stored as rows of EVENT_FIELDS values rather than dicts, in one
+    gzip-compressed object next to the HTTP cache.
+    """
+
+    def __init__(
+        self,
+        s3_manager=None,
+        bucket_name="jetaa-events",
+        s3_key="cache/calendar_months.json.gz",
+        ttl_hours=6,
+        max_age_months=24,
+    ):
+        self.s3_manager = s3_manager
+        self.bucket_name = bucket_name
+        self.s3_key = s3_key
+        self.ttl_seconds = ttl_hours * 60 * 60
+        self.max_age_months = max_age_months
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.frozen = 0
+        self.lock = threading.Lock()
+
+    def load(self):
+        cache_data = None
+        if self.s3_manager is not None:
+            cache_data = self.s3_manager.get_json_object(self.bucket_name, self.s3_key)
+        if (
+            not cache_data
+            or cache_data.get("version") != MONTH_CACHE_VERSION
+            or cache_data.get("fields") != list(EVENT_FIELDS)
+        ):
+            # Rows are positional, so a changed field set invalidates them
+            self.entries = {}
+        else:
+            self.entries = cache_data.get("months", {})
+        logger.info(f"Month cache loaded with {len(self.entries)} months")
+
+    def save(self, today=None):
+        """Freezes months that are over, drops old ones, then persists the cache."""
+        today = today or date.today()
+        oldest_month = today.year * 12 + today.month - 1 - self.max_age_months
+        with self.lock:
+            self.entries = {
+                key: entry
+                for key, entry in self.entries.items()
+                if entry["year"] * 12 + entry["month"] - 1 >= oldest_month
+            }
+            for key, entry in self.entries.items():
+                if not entry.get("frozen") and self._is_past(
+                    entry["year"], entry["month"], today
+                ):
+                    entry["frozen"] = True
+                    self.frozen += 1
+                    logger.debug(f"Froze {key} as it left the window")
+            cache_data = {
+                "version": MONTH_CACHE_VERSION,
+                "fields": list(EVENT_FIELDS),
+                "months": self.entries,
+            }
+        if self.s3_manager is None:
+            return False
+        saved = self.s3_manager.upload_snapshot_to_s3(
+            cache_data, self.bucket_name, self.s3_key
+        )
+        logger.info(f"Month cache saved: {self.stats()}")
+        return saved
+
+    @staticmethod
+    def _is_past(year, month, today):
+        return (year, month) < (today.year, today.month)
+
+    def _is_fresh(self, entry, year, month, today):
+        # A month that is over keeps its last fetch, even before save() freezes it
+        if entry.get("frozen") or self._is_past(year, month, today):
+            return True
+        return time.time() - entry["fetched_at"] < self.ttl_seconds
+
+    def get_or_fetch(self, source_name, year, month, fetch, today=None):
+        """Returns the month's events, calling ``fetch()`` only when needed.
+
+        ``fetch`` should raise on failure, so that errors are never cached.
+        """
+        today = today or date.today()
+        key = _month_key(source_name, year, month)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and self._is_fresh(entry, year, month, today):
+            with self.lock:
+                self.hits += 1
+            increment("month_cache_hits")
+            return [Event(*row) for row in entry["rows"]]
+
+        events = [Event.coerce(event) for event in fetch()]
+        frozen = self._is_past(year, month, today)
+        with self.lock:
+            self.misses += 1
+            self.frozen += int(frozen)
+            self.entries[key] = {
+                "year": year,
+                "month": month,
+                "fetched_at": time.time(),
+                "frozen": frozen,
+                "rows": [
+                    [getattr(event, field) for field in EVENT_FIELDS]
+                    for event in events
+                ],
+            }
+        increment("month_cache_misses")
+        if frozen:
+            logger.debug(f"Froze {key} after fetching it once")
+            increment("month_cache_frozen")
+        return events
+
+    def stats(self):
+        return {
+            "months": len(self.entries),
+            "frozen_months": sum(
+                1 for entry in self.entries.values() if entry.get("frozen")
+            ),
+            "hits": self.hits,
+            "misses": self.misses,
+            "newly_frozen": self.frozen,
+        }
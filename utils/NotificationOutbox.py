@@ -0,0 +1,208 @@
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_VERSION = 1
+PENDING = "pending"
+DELIVERED = "delivered"
+FAILED = "failed"
+
+
+def idempotency_key(event, kind="new"):
+    """Returns a stable key for a notification about ``event``.
+
+    New-event notifications are keyed by the event's identity, so the same
+    listing is never announced twice. Change notifications also include the
+    changed fields, so each distinct edit is announced once.
+    """
+    fields = [
+        kind,
+        event.get("event_source"),
+        event.get("event_url"),
+        event.get("event_name"),
+        event.get("event_date"),
+    ]
+    if kind != "new":
+        fields.extend([event.get("event_time"), event.get("event_price")])
+    joined = "\x1f".join(str(field) for field in fields)
+    return hashlib.blake2b(joined.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class NotificationOutbox:
+    """Durable queue of chat notifications, persisted through S3Manager.
+
+    Events are enqueued with an idempotency key before anything is sent, and each
+    delivered message is recorded straight away. A run that stops partway leaves
+    the remaining entries pending for the next invocation, and events that were
+    already delivered are not queued again.
+    """
+
+    def __init__(
+        self,
+        s3_manager,
+        bucket_name="jetaa-events",
+        s3_key="outbox/notifications.json.gz",
+        max_attempts=5,
+        delivered_retention_days=30,
+    ):
+        self.s3_manager = s3_manager
+        self.bucket_name = bucket_name
+        self.s3_key = s3_key
+        self.max_attempts = max_attempts
+        self.delivered_retention_seconds = delivered_retention_days * 24 * 60 * 60
+        self.entries = {}
+
+    def load(self):
+        """Reads the persisted outbox; only a missing object starts an empty one.
+
+        Any other read error is raised, as saving over an outbox that could not
+        be read would drop its pending entries and delivered history.
+        """
+        outbox_data = self.s3_manager.read_json_object(self.bucket_name, self.s3_key)
+        if not outbox_data or outbox_data.get("version") != OUTBOX_VERSION:
+            self.entries = {}
+        else:
+            self.entries = outbox_data.get("entries", {})
+        logger.info(f"Outbox loaded: {self.stats()}")
+
+    def save(self):
+        """Prunes old delivered and failed entries, then persists the outbox."""
+        cutoff = time.time() - self.delivered_retention_seconds
+        self.entries = {
+            key: entry
+            for key, entry in self.entries.items()
+            if entry["state"] == PENDING or entry["updated_at"] >= cutoff
+        }
+        return self.s3_manager.upload_snapshot_to_s3(
+            {"version": OUTBOX_VERSION, "entries": self.entries},
+            self.bucket_name,
+            self.s3_key,
+        )
+
+    def enqueue(self, events, kind="new", header_title="✨ New Event Found!"):
+        """Adds events not seen before and returns how many were queued."""
+        queued = 0
+        now = time.time()
+        for event in events:
+            key = idempotency_key(event, kind)
+            if key in self.entries:
+                logger.debug(f"Skipping already queued notification {key}")
+                continue
+            self.entries[key] = {
+                "event": event,
+                "header_title": header_title,
+                "state": PENDING,
+                "attempts": 0,
+                "enqueued_at": now,
+                "updated_at": now,
+            }
+            queued += 1
+        logger.info(f"Queued {queued} of {len(events)} {kind} notifications")
+        return queued
+
+    def pending(self):
+        """Returns pending (key, entry) pairs, oldest first."""
+        return sorted(
+            (
+                (key, entry)
+                for key, entry in self.entries.items()
+                if entry["state"] == PENDING
+            ),
+            key=lambda item: item[1]["enqueued_at"],
+        )
+
+    def _mark_delivered(self, keys):
+        now = time.time()
+        for key in keys:
+            self.entries[key]["state"] = DELIVERED
+            self.entries[key]["updated_at"] = now
+
+    def _mark_attempt_failed(self, keys):
+        now = time.time()
+        for key in keys:
+            entry = self.entries[key]
+            entry["attempts"] += 1
+            entry["updated_at"] = now
+            if entry["attempts"] >= self.max_attempts:
+                logger.error(f"Giving up on notification {key}")
+                entry["state"] = FAILED
+
+    def flush(self, chat_manager, max_events=None, deadline=None):
+        """Delivers pending entries in message-sized chunks and returns stats.
+
+        The outbox is saved after every delivered message. Work stops once
+        ``max_events`` have been attempted, or when the monotonic ``deadline``
+        passes or a retry would cross it. Whatever is left stays pending for the
+        next run, without counting as a failed attempt.
+        """
+        flush_stats = {}
+        pending_entries = self.pending()
+        if max_events is not None:
+            pending_entries = pending_entries[:max_events]
+
+        chunk_size = chat_manager.max_cards_per_message
+        deferred = False
+        for chunk_start in range(0, len(pending_entries), chunk_size):
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning("Stopping outbox flush before the deadline")
+                break
+
+            chunk = pending_entries[chunk_start : chunk_start + chunk_size]
+            # Entries sent together must share a card header
+            for header_title in dict.fromkeys(
+                entry["header_title"] for _, entry in chunk
+            ):
+                keys_by_event = {
+                    id(entry["event"]): key
+                    for key, entry in chunk
+                    if entry["header_title"] == header_title
+                }
+                events = [
+                    entry["event"]
+                    for _, entry in chunk
+                    if entry["header_title"] == header_title
+                ]
+                failed_keys = []
+
+                def record_delivered(delivered_events):
+                    self._mark_delivered(
+                        [keys_by_event[id(event)] for event in delivered_events]
+                    )
+                    self.save()
+
+                def record_failed(failed_events):
+                    failed_keys.extend(
+                        keys_by_event[id(event)] for event in failed_events
+                    )
+
+                chunk_stats = chat_manager.notify_events(
+                    events,
+                    header_title=header_title,
+                    on_delivered=record_delivered,
+                    on_failed=record_failed,
+                    deadline=deadline,
+                )
+                for stat_name, value in chunk_stats.items():
+                    flush_stats[stat_name] = flush_stats.get(stat_name, 0) + value
+
+                if failed_keys:
+                    self._mark_attempt_failed(failed_keys)
+                    self.save()
+                if chunk_stats["events_deferred"]:
+                    deferred = True
+                    break
+            if deferred:
+                logger.warning("Stopping outbox flush, a retry would pass the deadline")
+                break
+
+        flush_stats["pending_remaining"] = len(self.pending())
+        logger.info(f"Outbox flushed: {flush_stats}")
+        return flush_stats
+
+    def stats(self):
+        states = {PENDING: 0, DELIVERED: 0, FAILED: 0}
+        for entry in self.entries.values():
+            states[entry["state"]] += 1
+        return states
@@ -0,0 +1,107 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from utils.Metrics import increment
+from utils.TokenBucket import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class HostPolicy:
+    """How politely one host is treated; the defaults apply no limits at all.
+
+    ``requests_per_second`` spaces request starts, ``max_concurrency`` caps the
+    requests in flight, and ``jitter_seconds`` adds a random delay of up to that
+    long before each request.
+    """
+
+    def __init__(
+        self, requests_per_second=None, max_concurrency=None, jitter_seconds=0.0
+    ):
+        self.requests_per_second = requests_per_second
+        self.max_concurrency = max_concurrency
+        self.jitter_seconds = jitter_seconds
+
+    @classmethod
+    def from_string(cls, policy_text):
+        """Parses "rate=0.5,concurrency=1,jitter=3"; every setting is optional."""
+        settings = {}
+        for setting in policy_text.split(","):
+            name, _, value = setting.partition("=")
+            if name.strip():
+                settings[name.strip()] = value.strip()
+        concurrency = settings.get("concurrency")
+        return cls(
+            requests_per_second=float(settings["rate"]) if "rate" in settings else None,
+            max_concurrency=int(concurrency) if concurrency else None,
+            jitter_seconds=float(settings.get("jitter", 0)),
+        )
+
+
+class _HostState:
+    def __init__(self, policy):
+        self.policy = policy
+        self.rate_limiter = (
+            TokenBucket(policy.requests_per_second, capacity=1)
+            if policy.requests_per_second
+            else None
+        )
+        self.concurrency = (
+            threading.BoundedSemaphore(policy.max_concurrency)
+            if policy.max_concurrency
+            else None
+        )
+
+
+class RequestScheduler:
+    """Applies per-host politeness policies to requests from every session.
+
+    Each host has its own rate limiter and concurrency cap, so waiting on a
+    slow or sensitive host never holds up requests to the others. Hosts without
+    a policy are not limited.
+    """
+
+    def __init__(self):
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def configure_host(self, host, policy):
+        """Sets the policy of ``host``; None removes any limits.
+
+        Setting the policy a host already has keeps its current limiter state.
+        """
+        with self.lock:
+            if policy is None:
+                self.hosts.pop(host, None)
+            elif host not in self.hosts or self.hosts[host].policy is not policy:
+                self.hosts[host] = _HostState(policy)
+
+    @contextmanager
+    def slot(self, url):
+        """Waits until a request to ``url`` may start, then holds its slot."""
+        host_state = self.hosts.get(urlsplit(url).hostname)
+        if host_state is None:
+            yield
+            return
+
+        started = time.monotonic()
+        if host_state.concurrency is not None:
+            host_state.concurrency.acquire()
+        try:
+            if host_state.rate_limiter is not None:
+                host_state.rate_limiter.acquire()
+            if host_state.policy.jitter_seconds:
+                time.sleep(random.uniform(0, host_state.policy.jitter_seconds))
+            increment("scheduler_wait_seconds", time.monotonic() - started)
+            yield
+        finally:
+            if host_state.concurrency is not None:
+                host_state.concurrency.release()
+
+
+# Shared by every session, so a host's limits hold across fetchers and threads
+request_scheduler = RequestScheduler()
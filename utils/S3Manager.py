@@ -1,77 +1,249 @@
 import csv
+import gzip
 import io
 import json
 import logging
 import sys
+import threading
 from datetime import datetime, timedelta, timezone
 
 import boto3
-from botocore.exceptions import NoCredentialsError
+from botocore.exceptions import ClientError, NoCredentialsError
+
+from utils.Event import json_default
 
 logger = logging.getLogger(__name__)
 
+SNAPSHOT_SUFFIXES = (".json", ".json.gz")
+
+_s3_resource = None
+_s3_resource_lock = threading.Lock()
+
+
+def get_s3_resource():
+    """Returns the process-wide S3 resource, creating it on first use.
+
+    The resource lives at module level, so warm Lambda invocations reuse it and
+    its connection pool instead of building a new one per S3Manager.
+    """
+    global _s3_resource
+    with _s3_resource_lock:
+        if _s3_resource is None:
+            _s3_resource = boto3.resource("s3")
+        return _s3_resource
+
 
 class S3Manager:
-    def __init__(self):
-        self.s3_resource = boto3.resource("s3")
+    def __init__(self, s3_resource=None):
+        self.s3_resource = s3_resource or get_s3_resource()
+
+    @staticmethod
+    def _is_snapshot_key(key):
+        return key.endswith(SNAPSHOT_SUFFIXES)
+
+    @classmethod
+    def _is_scan_snapshot_key(cls, key):
+        # Weekly summaries share the prefix and suffix but are not scan snapshots
+        return cls._is_snapshot_key(key) and "weekly" not in key
+
+    @staticmethod
+    def _load_json_response(key, response):
+        """Decodes a GetObject response, detecting gzip from the key or headers.
 
-    def get_latest_json_file_resource(self, bucket_name, prefix):
-        """Returns the content of the latest JSON file from an S3 bucket using boto3 resource, optionally filtered by a prefix."""
+        Compressed bodies are decompressed as they are read rather than buffered,
+        and plain pretty-printed snapshots written before the compact format load
+        unchanged.
+        """
+        body = response["Body"]
+        is_gzip = (
+            key.endswith(".gz")
+            or response.get("ContentEncoding") == "gzip"
+            or response.get("ContentType") in ("application/gzip", "application/x-gzip")
+        )
+        if is_gzip:
+            with gzip.GzipFile(fileobj=body, mode="rb") as gzip_body:
+                return json.load(gzip_body)
+        return json.load(body)
+
+    def _get_json(self, bucket_name, file_name):
+        response = self.s3_resource.Object(bucket_name, file_name).get()
+        return self._load_json_response(file_name, response)
+
+    @staticmethod
+    def _manifest_key(prefix):
+        # Kept outside the snapshot prefix so listings of it never include the manifest
+        return f"manifests/{prefix}/latest.json"
+
+    def update_latest_manifest(self, bucket_name, prefix, file_name):
+        """Points the latest-snapshot manifest for a prefix at ``file_name``.
+
+        S3 replaces an object atomically, so readers see either the old or the new
+        pointer. Call this only after the snapshot itself has been uploaded.
+        """
+        manifest = {
+            "latest_key": file_name,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        return self.upload_json_to_s3(manifest, bucket_name, self._manifest_key(prefix))
+
+    def rebuild_latest_manifest(self, bucket_name, prefix):
+        """Finds the latest snapshot by listing the prefix and rewrites the manifest."""
         bucket = self.s3_resource.Bucket(bucket_name)
         try:
             json_files = [
                 obj
                 for obj in bucket.objects.filter(Prefix=prefix)
-                if obj.key.endswith(".json") and "weekly" not in obj.key
+                if self._is_scan_snapshot_key(obj.key)
             ]
-            if not json_files:
-                return "No JSON files found with the specified prefix."
+        except Exception as listing_error:
+            logger.error(f"Failed to list {prefix} in {bucket_name}: {listing_error}")
+            return None
+        if not json_files:
+            return None
 
-            latest_file = max(json_files, key=lambda x: x.last_modified)
+        latest_file = max(json_files, key=lambda x: x.last_modified)
+        self.update_latest_manifest(bucket_name, prefix, latest_file.key)
+        logger.info(f"Rebuilt latest manifest for {prefix}: {latest_file.key}")
+        return latest_file.key
 
-            json_object = json.load(bucket.Object(latest_file.key).get()["Body"])
-            logger.debug(f"JSON object: {json_object}")
-            logger.debug(f"JSON object type: {type(json_object)}")
-        except NoCredentialsError:
-            logger.debug("No AWS credentials found. Please configure them to proceed.")
-            return False
-        except Exception as latest_json_get_error:
-            logger.debug(f"An error occurred: {latest_json_get_error}")
-            return False
+    def get_latest_snapshot_key(self, bucket_name, prefix, max_manifest_age_hours=48):
+        """Returns the latest snapshot key from the manifest, rebuilding it if stale.
+
+        The manifest is rebuilt from a listing when it is missing or older than
+        ``max_manifest_age_hours``. Returns None when there are no snapshots.
+        """
+        manifest = self.get_json_object(bucket_name, self._manifest_key(prefix))
+        if manifest and manifest.get("latest_key"):
+            try:
+                manifest_age = datetime.now(timezone.utc) - datetime.fromisoformat(
+                    manifest["updated_at"]
+                )
+            except (KeyError, TypeError, ValueError):
+                manifest_age = None
+            if manifest_age is not None and manifest_age <= timedelta(
+                hours=max_manifest_age_hours
+            ):
+                return manifest["latest_key"]
+            logger.info(f"Latest manifest for {prefix} is stale")
+
+        return self.rebuild_latest_manifest(bucket_name, prefix)
+
+    def get_latest_snapshot(self, bucket_name, prefix, max_manifest_age_hours=48):
+        """Returns the latest snapshot by reading the manifest instead of listing.
+
+        A manifest pointing at an object that cannot be read is rebuilt once.
+        """
+        latest_key = self.get_latest_snapshot_key(
+            bucket_name, prefix, max_manifest_age_hours
+        )
+        if latest_key is None:
+            return "No JSON files found with the specified prefix."
 
+        json_object = self.get_json_object(bucket_name, latest_key)
+        if json_object is not None:
+            logger.debug(f"Loaded latest snapshot {latest_key}")
+            return json_object
+
+        logger.info(f"Manifest points at unreadable snapshot {latest_key}")
+        latest_key = self.rebuild_latest_manifest(bucket_name, prefix)
+        if latest_key is None:
+            return "No JSON files found with the specified prefix."
+
+        json_object = self.get_json_object(bucket_name, latest_key)
+        if json_object is None:
+            return False
         return json_object
 
-    def get_json_file_from_week_ago(self, bucket_name, prefix):
-        """Returns the JSON file from S3 that was modified a week ago."""
+    @staticmethod
+    def build_snapshot_key(prefix, timestamp):
+        """Returns the date-partitioned key for a snapshot taken at ``timestamp``."""
+        return (
+            f"{prefix}/{timestamp.strftime('%Y/%m/%d')}/"
+            f"events_{timestamp.strftime('%Y-%m-%d-%H:%M:%S')}.json.gz"
+        )
+
+    def get_snapshot_key_nearest(self, bucket_name, prefix, target_time, search_days=3):
+        """Returns the key of the snapshot closest to ``target_time``, or None.
+
+        Only the ``prefix/YYYY/MM/DD/`` partition of the target day is listed, then
+        neighbouring days up to ``search_days`` away if it is empty. Falls back to a
+        full listing when no partition has snapshots, so flat keys written before
+        the date-partitioned layout stay readable.
+        """
         bucket = self.s3_resource.Bucket(bucket_name)
         try:
-            # Make the current datetime timezone-aware
-            one_week_ago = datetime.now(timezone.utc) - timedelta(weeks=1)
-            json_files = [
-                obj
-                for obj in bucket.objects.filter(Prefix=prefix)
-                if obj.key.endswith(".json")
-            ]
-            if not json_files:
-                return "No JSON files found with the specified prefix."
+            for day_offset in range(search_days + 1):
+                for direction in (-1, 1) if day_offset else (0,):
+                    partition_day = target_time + timedelta(days=direction * day_offset)
+                    partition_prefix = f"{prefix}/{partition_day.strftime('%Y/%m/%d')}/"
+                    nearest_key = self._nearest_key_in_listing(
+                        bucket, partition_prefix, target_time
+                    )
+                    if nearest_key:
+                        logger.debug(
+                            f"Nearest snapshot to {target_time}: {nearest_key}"
+                        )
+                        return nearest_key
 
-            # Find the file closest to one week ago
-            week_old_file = min(
-                json_files,
-                key=lambda x: abs((x.last_modified - one_week_ago).total_seconds()),
+            logger.info("No partitioned snapshot found, falling back to a full listing")
+            return self._nearest_key_in_listing(bucket, prefix, target_time)
+        except NoCredentialsError:
+            logger.debug("No AWS credentials found. Please configure them to proceed.")
+            return None
+        except Exception as partition_error:
+            logger.debug(
+                f"An error occurred while listing partitions: {partition_error}"
             )
+            return None
 
-            json_object = json.load(bucket.Object(week_old_file.key).get()["Body"])
-            logger.debug(f"JSON object from a week ago: {json_object}")
+    def _nearest_key_in_listing(self, bucket, prefix, target_time):
+        json_files = [
+            obj
+            for obj in bucket.objects.filter(Prefix=prefix)
+            if self._is_scan_snapshot_key(obj.key)
+        ]
+        if not json_files:
+            return None
+
+        nearest_file = min(
+            json_files,
+            key=lambda x: abs((x.last_modified - target_time).total_seconds()),
+        )
+        return nearest_file.key
+
+    def get_json_object(self, bucket_name, file_name):
+        """Returns the parsed content of a JSON object, or None if it cannot be read."""
+        try:
+            json_object = self._get_json(bucket_name, file_name)
         except NoCredentialsError:
             logger.debug("No AWS credentials found. Please configure them to proceed.")
-            return False
-        except Exception as e:
-            logger.debug(f"An error occurred while fetching week-old JSON: {e}")
-            return False
+            return None
+        except Exception as json_get_error:
+            logger.debug(
+                f"Could not read {file_name} from {bucket_name}: {json_get_error}"
+            )
+            return None
 
         return json_object
 
+    @staticmethod
+    def _is_missing_key_error(error):
+        # GetObject reports "NoSuchKey", HeadObject a bare "404"
+        return error.response.get("Error", {}).get("Code") in ("NoSuchKey", "404")
+
+    def read_json_object(self, bucket_name, file_name):
+        """Returns the parsed content of a JSON object, or None if it does not exist.
+
+        Unlike ``get_json_object``, any other read error is raised, for callers
+        that would lose data by treating an unreadable object as a missing one.
+        """
+        try:
+            return self._get_json(bucket_name, file_name)
+        except ClientError as read_error:
+            if self._is_missing_key_error(read_error):
+                return None
+            raise
+
     def _csv_formatter(self, events_collected):
         logger.debug("Formatting csv before putting to S3")
         try:
@@ -122,7 +294,7 @@ class S3Manager:
         return True
 
     def upload_json_to_s3(self, dictionary, bucket_name, file_name):
-        json_data = json.dumps(dictionary, indent=4)
+        json_data = json.dumps(dictionary, indent=4, default=json_default)
 
         try:
             logger.debug("Putting to S3 bucket")
@@ -138,6 +310,32 @@ class S3Manager:
 
         return True
 
+    def upload_snapshot_to_s3(self, dictionary, bucket_name, file_name):
+        """Uploads ``dictionary`` as compact, gzip-compressed JSON."""
+        compressed_data = gzip.compress(
+            json.dumps(dictionary, separators=(",", ":"), default=json_default).encode(
+                "utf-8"
+            )
+        )
+
+        try:
+            logger.debug("Putting compressed snapshot to S3 bucket")
+            self.s3_resource.Object(bucket_name, file_name).put(
+                Body=compressed_data,
+                ContentType="application/json",
+                ContentEncoding="gzip",
+            )
+            logger.debug(
+                f"Uploaded {file_name} ({len(compressed_data)} bytes) to S3 bucket {bucket_name}"
+            )
+        except Exception as upload_error:
+            logger.error(
+                f"Failed to upload {file_name} to S3 bucket {bucket_name}: {upload_error}"
+            )
+            return False
+
+        return True
+
     def file_exists(self, bucket_name, file_name):
         """Checks if a file exists in the specified S3 bucket."""
         try:
@@ -165,7 +363,7 @@ class S3Manager:
 # if __name__ == "__main__":
 #     s3_manager = S3Manager()
 #     print(
-#         s3_manager.get_json_file_from_week_ago(
+#         s3_manager.get_latest_snapshot(
 #             bucket_name="jetaa-events", prefix="as-json"
 #         )
 #     )
@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
+
+from utils.Event import Event
+from utils.Metrics import increment, source_scope
+
+logger = logging.getLogger(__name__)
+
+
+class SourceFetchError(Exception):
+    """Raised by a fetcher that could not read its source's listing."""
+
+
+class SourceOrchestrator:
+    """Runs event source fetchers concurrently, each with its own deadline."""
+
+    def __init__(self, max_workers=5, default_timeout=120, poll_interval=0.1):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.poll_interval = poll_interval
+        self.sources = {}
+        self.report = {}
+
+    def add_source(self, source_name, fetch_callable, timeout=None):
+        """Registers a zero-argument callable returning a list of events."""
+        self.sources[source_name] = {
+            "fetch": fetch_callable,
+            "timeout": timeout if timeout is not None else self.default_timeout,
+        }
+
+    def _run_source(self, source_name, started_at, lock):
+        with lock:
+            started_at[source_name] = time.monotonic()
+        # Requests and counters recorded while fetching are attributed to the source
+        with source_scope(source_name):
+            return self.sources[source_name]["fetch"]()
+
+    def _record(self, source_name, status, started_at, events=None, error=None):
+        start = started_at.get(source_name)
+        duration = time.monotonic() - start if start is not None else 0.0
+        self.report[source_name] = {
+            "status": status,
+            "duration_seconds": round(duration, 3),
+            "event_count": len(events) if events else 0,
+        }
+        if error is not None:
+            self.report[source_name]["error"] = str(error)
+
+        increment("fetch_seconds", duration, source_name)
+        increment("events", self.report[source_name]["event_count"], source_name)
+        if status != "ok":
+            increment(status, 1, source_name)
+
+    def run(self):
+        """Returns a dict of source name to events for the sources that completed.
+
+        A source that raises or overruns its deadline is left out of the results
+        and marked in ``self.report``, so the remaining sources are not held up.
+        Callers carry its previous events forward, so that the next comparison
+        does not treat its whole listing as new.
+        """
+        results = {}
+        self.report = {}
+        if not self.sources:
+            return results
+
+        started_at = {}
+        lock = threading.Lock()
+        run_started = time.monotonic()
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="source"
+        )
+        futures = {
+            executor.submit(
+                copy_context().run, self._run_source, source_name, started_at, lock
+            ): source_name
+            for source_name in self.sources
+        }
+        pending = set(futures)
+
+        try:
+            while pending:
+                now = time.monotonic()
+                with lock:
+                    started = dict(started_at)
+
+                # Sources still queued behind the pool have no deadline yet
+                wait_for = self.poll_interval
+                for future in list(pending):
+                    source_name = futures[future]
+                    if source_name not in started:
+                        continue
+                    deadline = (
+                        started[source_name] + self.sources[source_name]["timeout"]
+                    )
+                    if now >= deadline and not future.done():
+                        logger.error(
+                            f"Source {source_name} timed out after "
+                            f"{self.sources[source_name]['timeout']}s"
+                        )
+                        future.cancel()
+                        pending.discard(future)
+                        self._record(source_name, "timed_out", started)
+                    else:
+                        wait_for = min(wait_for, max(deadline - now, 0))
+                if not pending:
+                    break
+
+                done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    source_name = futures[future]
+                    try:
+                        events = future.result()
+                    except Exception as source_error:
+                        logger.error(f"Source {source_name} failed: {source_error}")
+                        self._record(
+                            source_name, "failed", started_at, error=source_error
+                        )
+                        continue
+                    # Results served from the HTTP cache come back as dicts
+                    results[source_name] = [
+                        Event.coerce(event) for event in events or []
+                    ]
+                    self._record(source_name, "ok", started_at, events)
+        finally:
+            # Do not block on hung fetchers; their threads are abandoned
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        total_duration = time.monotonic() - run_started
+        summed_duration = sum(
+            source_report["duration_seconds"] for source_report in self.report.values()
+        )
+        logger.info(
+            f"Fetched {len(self.sources)} sources in {total_duration:.2f}s "
+            f"(sequential sum {summed_duration:.2f}s)"
+        )
+        for source_name, source_report in self.report.items():
+            logger.info(f"Source {source_name}: {source_report}")
+
+        return results
@@ -0,0 +1,37 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket that blocks callers until a token is available."""
+
+    def __init__(self, rate_per_second, capacity=1):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second
+        )
+        self.updated_at = now
+
+    def acquire(self):
+        """Takes one token, sleeping until the bucket has refilled enough."""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate_per_second
+            time.sleep(wait_seconds)
+
+    def drain(self):
+        """Empties the bucket, e.g. after the server reports it is rate limiting."""
+        with self.lock:
+            self._refill()
+            self.tokens = 0
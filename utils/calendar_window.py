@@ -0,0 +1,41 @@
+from datetime import date
+
+DEFAULT_MONTHS_AHEAD = 6
+DEFAULT_MONTHS_BEHIND = 0
+
+
+def rolling_window(months_ahead=DEFAULT_MONTHS_AHEAD, today=None, months_behind=0):
+    """Returns (year, month) pairs from ``months_behind`` before the current month
+    to ``months_ahead`` after it.
+
+    The window crosses year boundaries, so in November with 3 months ahead it
+    covers November and December plus January and February of the next year.
+    """
+    today = today or date.today()
+    current_month = today.year * 12 + today.month - 1
+    return [
+        (month_index // 12, month_index % 12 + 1)
+        for month_index in range(
+            current_month - months_behind, current_month + months_ahead + 1
+        )
+    ]
+
+
+def full_year(year):
+    """Returns the (year, month) pairs of every month of ``year``."""
+    return [(year, month) for month in range(1, 13)]
+
+
+def calendar_months(year=None, months_ahead=None, today=None, months_behind=None):
+    """Months a calendar fetcher should request.
+
+    A fixed ``year`` keeps the original whole-year mode; otherwise the rolling
+    window around the current month is used.
+    """
+    if year is not None:
+        return full_year(year)
+    if months_ahead is None:
+        months_ahead = DEFAULT_MONTHS_AHEAD
+    if months_behind is None:
+        months_behind = DEFAULT_MONTHS_BEHIND
+    return rolling_window(months_ahead, today, months_behind)
@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+
+def ordered_map(function, items, max_workers=1):
+    """Applies ``function`` to ``items`` on up to ``max_workers`` threads.
+
+    Results come back in input order. With a single worker the items are processed
+    inline, so the sequential path has no thread overhead. Each call runs in a copy
+    of the caller's context, so context variables such as the metrics source
+    carry over to the worker threads.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        contexts = [copy_context() for _ in items]
+        return list(
+            executor.map(
+                lambda context, item: context.run(function, item), contexts, items
+            )
+        )
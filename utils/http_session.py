@@ -0,0 +1,80 @@
+import threading
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from utils.RequestScheduler import request_scheduler
+
+# Optional callable returning the transport adapter for a pool size, e.g. one
+# that routes requests to a local replay server instead of the live sites
+_adapter_factory = None
+
+# Sessions kept at module level survive between warm Lambda invocations, so
+# their connection pools and TLS sessions are reused instead of rebuilt
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def set_adapter_factory(adapter_factory):
+    """Makes sessions created from now on use ``adapter_factory(pool_maxsize)``.
+
+    Pass None to go back to the default HTTPAdapter.
+    """
+    global _adapter_factory
+    with _sessions_lock:
+        _adapter_factory = adapter_factory
+        # Cached sessions were built with the previous adapter
+        _sessions.clear()
+
+
+class ScheduledAdapter(BaseAdapter):
+    """Transport adapter making each request wait for its host's scheduler slot.
+
+    Scheduling happens per hop: a redirect followed by the session sends a new
+    request through here after the previous slot was released, so hosts limited
+    to one request in flight cannot deadlock on their own redirects.
+    """
+
+    def __init__(self, adapter):
+        super().__init__()
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):
+        with request_scheduler.slot(request.url):
+            return self.adapter.send(request, **kwargs)
+
+    def close(self):
+        self.adapter.close()
+
+
+def create_session(pool_maxsize=10, headers=None):
+    """Returns a keep-alive session whose connection pool fits ``pool_maxsize`` workers."""
+    session = requests.Session()
+    if _adapter_factory is not None:
+        adapter = _adapter_factory(pool_maxsize)
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+    adapter = ScheduledAdapter(adapter)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def get_session(name, pool_maxsize=10, host_policies=None):
+    """Returns the process-wide session cached under ``name``, creating it once.
+
+    A session is cached per name and pool size, so each fetcher keeps its own
+    pool sized for its workers. ``host_policies`` maps host names to the
+    HostPolicy the request scheduler applies to them.
+    """
+    for host, policy in (host_policies or {}).items():
+        request_scheduler.configure_host(host, policy)
+    key = (name, pool_maxsize)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = create_session(pool_maxsize=pool_maxsize)
+            _sessions[key] = session
+        return session
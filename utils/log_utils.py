@@ -0,0 +1,133 @@
+import logging
+import os
+import random
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def _env_flag(name):
+    return os.environ.get(name, "false").lower() == "true"
+
+
+def configure_logging():
+    """Sets up the root logger from the environment and returns it.
+
+    LOG_LEVEL picks the level (INFO by default). Existing handlers, such as the
+    one the Lambda runtime installs, are kept and only have their level set.
+    """
+    level = os.environ.get("LOG_LEVEL", "INFO").upper()
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+
+    if not root_logger.hasHandlers():
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root_logger.addHandler(console_handler)
+    for handler in root_logger.handlers:
+        handler.setLevel(level)
+    return root_logger
+
+
+def _render_bounded(value, budget, parts, nested=False):
+    """Appends the text of ``value`` to ``parts`` and returns the budget left.
+
+    Containers hand each item the budget the items before it left over, and
+    stop rendering items once it is spent.
+    """
+    if isinstance(value, dict):
+        entries, opening, closing = value.items(), "{", "}"
+    elif isinstance(value, (list, tuple)):
+        entries = ((None, item) for item in value)
+        opening, closing = ("(", ")") if isinstance(value, tuple) else ("[", "]")
+    else:
+        text = repr(value) if nested else str(value)
+        if len(text) > budget:
+            kept = max(budget, 0)
+            text = f"{text[:kept]}... ({len(text) - kept} more chars)"
+        parts.append(text)
+        return budget - len(text)
+
+    parts.append(opening)
+    budget -= len(opening)
+    rendered = 0
+    for key, item in entries:
+        if budget <= 0:
+            break
+        if rendered:
+            parts.append(", ")
+            budget -= 2
+        if opening == "{":
+            key_text = f"{key!r}: "
+            parts.append(key_text)
+            budget -= len(key_text)
+        budget = _render_bounded(item, budget, parts, nested=True)
+        rendered += 1
+    if rendered < len(value):
+        separator = ", " if rendered else ""
+        parts.append(f"{separator}... ({len(value) - rendered} more items)")
+    parts.append(closing)
+    return budget - len(closing)
+
+
+def _bounded_text(value, max_chars):
+    """Formats ``value`` without rendering more than roughly ``max_chars``.
+
+    Dicts, lists and tuples are walked item by item, nested ones included, and
+    the rest of a container is replaced by a count once the budget is spent. A
+    summary of a large snapshot therefore costs about as much as a small one.
+    """
+    parts = []
+    _render_bounded(value, max_chars, parts)
+    return "".join(parts)
+
+
+class LogPayload:
+    """Log argument that is only formatted if a handler emits the record.
+
+    With ``full`` set the value is rendered whole; otherwise it is cut to
+    ``max_chars`` and the number of dropped items or characters is noted.
+    """
+
+    __slots__ = ("value", "max_chars", "full")
+
+    def __init__(self, value, max_chars, full=False):
+        self.value = value
+        self.max_chars = max_chars
+        self.full = full
+
+    def __str__(self):
+        if self.full:
+            return str(self.value)
+        return _bounded_text(self.value, self.max_chars)
+
+    __repr__ = __str__
+
+
+def summarize(value, max_chars=None):
+    """Wraps ``value`` for logging, truncated to LOG_MAX_CHARS (500 by default)."""
+    if max_chars is None:
+        max_chars = int(os.environ.get("LOG_MAX_CHARS", 500))
+    return LogPayload(value, max_chars)
+
+
+def payload(value):
+    """Wraps a whole payload, e.g. a snapshot or event list, for logging.
+
+    The payload is dumped in full only when LOG_FULL_PAYLOADS is "true";
+    otherwise it is summarized like ``summarize``.
+    """
+    summary = summarize(value)
+    summary.full = _env_flag("LOG_FULL_PAYLOADS")
+    return summary
+
+
+def debug_sampled(logger, message, *args):
+    """Logs a per-item debug line for a LOG_SAMPLE_RATE fraction of calls.
+
+    Meant for lines logged once per event; the rate defaults to 0.1, and
+    nothing is formatted or sampled unless DEBUG is enabled.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if random.random() < float(os.environ.get("LOG_SAMPLE_RATE", 0.1)):
+        logger.debug(message, *args)
@@ -0,0 +1,180 @@
+import calendar
+import logging
+import re
+from datetime import date, timedelta
+
+logger = logging.getLogger(__name__)
+
+MONTHS = {
+    **{name.lower(): number for number, name in enumerate(calendar.month_name) if name},
+    **{name.lower(): number for number, name in enumerate(calendar.month_abbr) if name},
+    "sept": 9,
+}
+WEEKDAY_PATTERN = re.compile(
+    r"\b(?:mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)(?:[a-z]*day)?\b\.?,?",
+    re.IGNORECASE,
+)
+TIME_PATTERN = re.compile(
+    r"\b\d{1,2}(?:[:.]\d{2})?\s*(?:am|pm)\b|\b\d{1,2}:\d{2}\b", re.IGNORECASE
+)
+NUMERIC_DATE_PATTERN = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})\b")
+RANGE_SEPARATOR_PATTERN = re.compile(
+    r"\s+(?:-|–|—|to|until)\s+|\s*[–—]\s*|(?<=[a-z\d])-(?=\d)", re.IGNORECASE
+)
+# Text marking a listing with no end date, e.g. "From 12 March" or
+# "12 March 2025 until further notice"
+OPEN_ENDED_PATTERN = re.compile(
+    r"^\s*from\b|\buntil further notice\b|\bonwards?\b|\bongoing\b", re.IGNORECASE
+)
+DATE_TOKEN_PATTERN = re.compile(r"\d+|[a-z]+", re.IGNORECASE)
+PRICE_PATTERN = re.compile(r"£\s*(\d+(?:,\d{3})*(?:\.\d{1,2})?)")
+FREE_PATTERN = re.compile(r"\bfree\b", re.IGNORECASE)
+# A date without a year that lies further back than this is read as next year's
+YEAR_ROLLOVER_DAYS = 180
+
+
+def _parse_date_part(text):
+    """Returns (day, month, year) from one side of a range; each may be None."""
+    day = month = year = None
+    for token in DATE_TOKEN_PATTERN.findall(text):
+        if token.isdigit():
+            if len(token) == 4 and year is None:
+                year = int(token)
+            elif len(token) <= 2 and day is None and 1 <= int(token) <= 31:
+                day = int(token)
+        elif month is None and token.lower() in MONTHS:
+            month = MONTHS[token.lower()]
+    return day, month, year
+
+
+def _build_date(year, month, day, last_day_of_month=False):
+    if day is None:
+        day = calendar.monthrange(year, month)[1] if last_day_of_month else 1
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_date_range(date_text, today=None):
+    """Parses free-text event dates into (start, end) dates, or (None, None).
+
+    Handles single dates ("12 March 2025", "Tuesday 18 March 2025, 6:45pm"),
+    ranges sharing a month or year ("22 - 30 March 2025", "12 March - 8 June
+    2025"), month-only text ("March 2025") and UK numeric dates ("12/03/2025").
+    Open-ended listings ("From 12 March 2025", "12 March 2025 until further
+    notice") return their start with an end of None. A missing year is taken
+    from ``today``.
+    """
+    if not date_text or not isinstance(date_text, str):
+        return None, None
+    today = today or date.today()
+
+    numeric_dates = NUMERIC_DATE_PATTERN.findall(date_text)
+    if numeric_dates:
+        parsed = []
+        for day, month, year in numeric_dates[:2]:
+            year = int(year) + 2000 if len(year) == 2 else int(year)
+            parsed.append(_build_date(year, int(month), int(day)))
+        return parsed[0], parsed[-1]
+
+    text = TIME_PATTERN.sub(" ", WEEKDAY_PATTERN.sub(" ", date_text))
+    has_open_marker = OPEN_ENDED_PATTERN.search(text) is not None
+    text = OPEN_ENDED_PATTERN.sub(" ", text)
+    parts = [part for part in RANGE_SEPARATOR_PATTERN.split(text) if part.strip()]
+    if not parts:
+        return None, None
+    # "From 12 March - 8 June 2025" is still a closed range
+    open_ended = has_open_marker and len(parts) == 1
+
+    start_day, start_month, start_year = _parse_date_part(parts[0])
+    end_day, end_month, end_year = _parse_date_part(parts[-1])
+    # The end of a range carries the month and year shared by both sides
+    end_month = end_month or start_month
+    start_month = start_month or end_month
+    if start_month is None:
+        return None, None
+    end_year = end_year or start_year
+    start_year = start_year or end_year
+
+    inferred_year = end_year is None
+    if inferred_year:
+        start_year = end_year = today.year
+    if len(parts) == 1:
+        end_day = start_day
+    if start_month > end_month and start_year == end_year:
+        # e.g. "December - February 2026" starts in the previous year
+        start_year -= 1
+
+    start = _build_date(start_year, start_month, start_day)
+    if open_ended:
+        if start is None:
+            return None, None
+        if inferred_year and start < today - timedelta(days=YEAR_ROLLOVER_DAYS):
+            start = start.replace(year=start.year + 1)
+        return start, None
+
+    end = _build_date(end_year, end_month, end_day, last_day_of_month=True)
+    if start is None or end is None:
+        return None, None
+    if inferred_year and end < today - timedelta(days=YEAR_ROLLOVER_DAYS):
+        start, end = start.replace(year=start.year + 1), end.replace(year=end.year + 1)
+    return start, end
+
+
+def parse_price(price_text):
+    """Returns the lowest price listed in pounds, 0.0 for free events, or None."""
+    if isinstance(price_text, (int, float)):
+        return float(price_text)
+    if not price_text or not isinstance(price_text, str):
+        return None
+    amounts = [
+        float(amount.replace(",", "")) for amount in PRICE_PATTERN.findall(price_text)
+    ]
+    if FREE_PATTERN.search(price_text):
+        amounts.append(0.0)
+    return min(amounts) if amounts else None
+
+
+def normalise_event(event, today=None):
+    """Adds ISO start/end dates and a numeric price to an Event, in place.
+
+    The raw ``event_date`` and ``event_price`` text is kept as scraped.
+    """
+    start, end = parse_date_range(event.event_date, today)
+    event.event_start_date = start.isoformat() if start else None
+    event.event_end_date = end.isoformat() if end else None
+    event.event_price_amount = parse_price(event.event_price)
+    return event
+
+
+def has_ended(event, today=None):
+    """True when the event's end date is known and before ``today``."""
+    event_end_date = event.get("event_end_date")
+    if not event_end_date:
+        return False
+    return event_end_date < (today or date.today()).isoformat()
+
+
+def normalise_snapshot(snapshot, today=None, prune_past=True):
+    """Normalises every event of a {source: [Event, ...]} snapshot.
+
+    With ``prune_past`` set, events that have already ended are dropped, so
+    snapshots and comparisons only carry current listings. Events without an
+    end date, such as open-ended exhibitions, are always kept. Returns the
+    normalised snapshot and the number of pruned events per source.
+    """
+    today = today or date.today()
+    normalised_snapshot = {}
+    pruned_counts = {}
+    for source_name, events in snapshot.items():
+        kept_events = []
+        for event in events:
+            normalise_event(event, today)
+            if prune_past and has_ended(event, today):
+                continue
+            kept_events.append(event)
+        normalised_snapshot[source_name] = kept_events
+        pruned_counts[source_name] = len(events) - len(kept_events)
+    logger.info(f"Pruned past events: {pruned_counts}")
+    return normalised_snapshot, pruned_counts